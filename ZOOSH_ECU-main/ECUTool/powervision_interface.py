@@ -11,9 +11,13 @@ The PowerVision can operate in two modes:
 """
 
 import ctypes
+import os
+import re
+import sys
 import time
 import threading
 from typing import Optional, List, Tuple
+from collections import deque
 from dataclasses import dataclass
 from enum import IntEnum
 import struct
@@ -69,6 +73,56 @@ class PVCommand(IntEnum):
     TUNE_LIST = 0x42
 
 
+# Hot-path command bytes as plain ints (global lookup, no enum attribute access)
+_CAN_SEND = int(PVCommand.CAN_SEND)
+_CAN_RECV = int(PVCommand.CAN_RECV)
+_ECU_SEND_UDS = int(PVCommand.ECU_SEND_UDS)
+_ECU_RECV_UDS = int(PVCommand.ECU_RECV_UDS)
+
+# Precompiled frame headers (cmd, CAN ID, DLC) / (cmd, ECU ID, length)
+_CAN_INIT_HDR = struct.Struct('>BI')
+_CAN_SEND_HDR = struct.Struct('>BIB')
+_CAN_RECV_HDR = struct.Struct('>BIB')
+_UDS_HDR = struct.Struct('>BHH')
+_UDS_ECU_HDR = struct.Struct('>BH')
+_UDS_LEN = struct.Struct('>H')
+_UDS_RESP_HDR = struct.Struct('>BH')
+
+# Fixed UDS requests whose complete PowerVision command can be built once
+_TESTER_PRESENT = bytes([0x3E, 0x00])
+_TESTER_PRESENT_7E0 = _UDS_HDR.pack(_ECU_SEND_UDS, 0x7E0, len(_TESTER_PRESENT)) + _TESTER_PRESENT
+
+# Windows thread priority for the RX thread
+THREAD_PRIORITY_ABOVE_NORMAL = 1
+# Linux SCHED_FIFO priority for the RX thread (needs CAP_SYS_NICE)
+RX_THREAD_FIFO_PRIORITY = 20
+
+
+def raise_thread_priority():
+    """Best-effort priority bump for the calling (RX) thread"""
+    try:
+        if sys.platform == 'win32':
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_ABOVE_NORMAL)
+        elif hasattr(os, 'sched_setscheduler'):
+            os.sched_setscheduler(
+                threading.get_native_id(),
+                os.SCHED_FIFO,
+                os.sched_param(RX_THREAD_FIFO_PRIORITY)
+            )
+    except (AttributeError, OSError):
+        pass
+
+
+# FTDI descriptions that identify a PowerVision (one pass, no upper() copy)
+_PV_DESC_RE = re.compile(r'POWERVISION|PV3|DYNOJET|FT232', re.IGNORECASE)
+
+# USB enumeration is slow (hundreds of ms on Windows) and the device
+# topology rarely changes, so list_devices() results are reused briefly.
+DEVICE_CACHE_TTL = 3.0
+_DEV_CACHE: Tuple[float, list] = (0.0, [])
+
+
 @dataclass
 class PowerVisionInfo:
     """PowerVision device information"""
@@ -79,6 +133,30 @@ class PowerVisionInfo:
     device_type: str = ""
 
 
+def parse_can_frames(buf: bytes) -> List[Tuple[int, bytes]]:
+    """
+    Parse every CAN_RECV frame in a contiguous receive buffer
+    
+    One USB read can carry several frames; walking the buffer with
+    unpack_from amortizes parsing over the whole packet.
+    """
+    frames = []
+    unpack_from = _CAN_RECV_HDR.unpack_from
+    hdr_size = _CAN_RECV_HDR.size
+    offset = 0
+    end = len(buf) - hdr_size
+    
+    while offset <= end:
+        cmd, can_id, dlc = unpack_from(buf, offset)
+        if cmd != _CAN_RECV:
+            break
+        start = offset + hdr_size
+        frames.append((can_id, bytes(buf[start:start+dlc])))
+        offset = start + dlc
+    
+    return frames
+
+
 # =============================================================================
 # FTDI Direct Interface (using ctypes)
 # =============================================================================
@@ -97,9 +175,15 @@ class FTDIDevice:
     FT_IO_ERROR = 4
     FT_INSUFFICIENT_RESOURCES = 5
     
+    # FT_SetEventNotification mask
+    FT_EVENT_RXCHAR = 1
+    
+    WAIT_OBJECT_0 = 0
+    
     def __init__(self):
         self.handle = None
         self.dll = None
+        self._rx_event = None
         self._load_dll()
     
     def _load_dll(self):
@@ -120,7 +204,6 @@ class FTDIDevice:
         # Try loading from Power Core directory
         try:
             # ftd2xx64.dll or ftd2xx.dll might be bundled
-            import os
             pc_path = r"C:\Program Files (x86)\Dynojet Power Core"
             for f in os.listdir(pc_path):
                 if f.lower().startswith('ftd2xx') and f.endswith('.dll'):
@@ -209,6 +292,44 @@ class FTDIDevice:
         if self.dll and self.handle:
             self.dll.FT_Close(self.handle)
             self.handle = None
+        if self._rx_event:
+            ctypes.windll.kernel32.CloseHandle(self._rx_event)
+            self._rx_event = None
+    
+    def enable_rx_event(self) -> bool:
+        """Have the driver signal a Win32 event when RX data arrives"""
+        if not self.handle or self._rx_event or sys.platform != 'win32':
+            return False
+        
+        kernel32 = ctypes.windll.kernel32
+        kernel32.CreateEventW.restype = ctypes.c_void_p
+        event = kernel32.CreateEventW(None, False, False, None)  # auto-reset
+        if not event:
+            return False
+        
+        status = self.dll.FT_SetEventNotification(
+            self.handle,
+            self.FT_EVENT_RXCHAR,
+            ctypes.c_void_p(event)
+        )
+        if status != self.FT_OK:
+            kernel32.CloseHandle(ctypes.c_void_p(event))
+            return False
+        
+        self._rx_event = ctypes.c_void_p(event)
+        return True
+    
+    def wait_rx(self, timeout_ms: int) -> bool:
+        """
+        Block until RX data arrives or timeout_ms passes
+        
+        Sleeps for the full timeout when no RX event is registered.
+        """
+        if not self._rx_event:
+            time.sleep(timeout_ms / 1000.0)
+            return False
+        return ctypes.windll.kernel32.WaitForSingleObject(
+            self._rx_event, timeout_ms) == self.WAIT_OBJECT_0
     
     def set_baud_rate(self, baud: int) -> bool:
         """Set baud rate"""
@@ -216,6 +337,25 @@ class FTDIDevice:
             return False
         return self.dll.FT_SetBaudRate(self.handle, baud) == self.FT_OK
     
+    def set_usb_parameters(self, in_size: int, out_size: int) -> bool:
+        """Set USB IN/OUT transfer sizes (multiple of 64, max 64 KiB)"""
+        if not self.handle:
+            return False
+        return self.dll.FT_SetUSBParameters(self.handle, in_size, out_size) == self.FT_OK
+    
+    def set_chars(self, event_char: int, event_enable: bool,
+                  error_char: int = 0, error_enable: bool = False) -> bool:
+        """Set event/error characters (event char flushes IN data immediately)"""
+        if not self.handle:
+            return False
+        return self.dll.FT_SetChars(
+            self.handle,
+            ctypes.c_ubyte(event_char),
+            ctypes.c_ubyte(1 if event_enable else 0),
+            ctypes.c_ubyte(error_char),
+            ctypes.c_ubyte(1 if error_enable else 0)
+        ) == self.FT_OK
+    
     def set_timeouts(self, read_ms: int, write_ms: int) -> bool:
         """Set read/write timeouts"""
         if not self.handle:
@@ -299,6 +439,21 @@ class PowerVisionInterface:
     READ_TIMEOUT = 1000
     WRITE_TIMEOUT = 1000
     
+    # Match USB transfers to the FT232H 1 KiB FIFO so short PowerVision
+    # frames aren't held back waiting to fill a 4 KiB default transfer
+    USB_TRANSFER_SIZE = 1024
+    
+    # Frame start marker - used as the FTDI event char so the chip flushes
+    # IN packets on a frame boundary instead of on the latency timer
+    FRAME_START = 0x7E
+    FRAME_ESCAPE = 0x7D
+    
+    RX_BUFFER_SIZE = 4096
+    
+    # ECU request IDs whose UDS command header is prebuilt on connect
+    # (physical 0x7E0, functional 0x7DF)
+    UDS_ECU_IDS = (0x7E0, 0x7DF)
+    
     def __init__(self):
         self.device = FTDIDevice()
         self.connected = False
@@ -306,35 +461,49 @@ class PowerVisionInterface:
         self._rx_thread: Optional[threading.Thread] = None
         self._running = False
         self._rx_callback = None
+        self._pending_frames = deque()
+        self._uds_hdr_cache: dict = {}
+        # Reused receive buffer; bytes past a returned message stay at the front
+        self._rx_buf = bytearray(self.RX_BUFFER_SIZE)
+        self._rx_len = 0
     
     @staticmethod
     def list_devices() -> List[PowerVisionInfo]:
         """List all connected PowerVision devices"""
-        devices = []
-        ftdi = FTDIDevice()
+        global _DEV_CACHE
         
-        for dev in ftdi.list_devices():
-            # Filter for PowerVision devices
-            desc = dev['description'].upper()
-            if 'POWERVISION' in desc or 'PV3' in desc or 'DYNOJET' in desc or 'FT232' in desc:
-                info = PowerVisionInfo(
+        cached_at, cached = _DEV_CACHE
+        if cached and time.monotonic() - cached_at < DEVICE_CACHE_TTL:
+            return list(cached)
+        
+        matched = []
+        generic = []
+        
+        # Single enumeration pass - classify PowerVision vs generic FTDI
+        for dev in FTDIDevice().list_devices():
+            if _PV_DESC_RE.search(dev['description']):
+                matched.append(PowerVisionInfo(
                     serial=dev['serial'],
                     description=dev['description'],
                     device_type=f"Type {dev['type']}"
-                )
-                devices.append(info)
-        
-        # Also check for generic FTDI devices that might be PowerVision
-        if not devices:
-            for dev in ftdi.list_devices():
-                info = PowerVisionInfo(
+                ))
+            else:
+                generic.append(PowerVisionInfo(
                     serial=dev['serial'],
                     description=dev['description'],
                     device_type=f"FTDI Type {dev['type']}"
-                )
-                devices.append(info)
+                ))
         
-        return devices
+        # Fall back to generic FTDI devices that might be PowerVision
+        devices = matched or generic
+        _DEV_CACHE = (time.monotonic(), devices)
+        return list(devices)
+    
+    @staticmethod
+    def invalidate_device_cache():
+        """Forget cached enumeration results (e.g. after a failed connect)"""
+        global _DEV_CACHE
+        _DEV_CACHE = (0.0, [])
     
     def connect(self, serial: str = None, index: int = 0) -> bool:
         """
@@ -350,15 +519,22 @@ class PowerVisionInterface:
             success = self.device.open(index)
         
         if not success:
+            self.invalidate_device_cache()
             return False
         
         # Configure device
         self.device.set_baud_rate(self.BAUD_RATE)
+        self.device.set_usb_parameters(self.USB_TRANSFER_SIZE, self.USB_TRANSFER_SIZE)
+        self.device.set_chars(self.FRAME_START, True)
         self.device.set_timeouts(self.READ_TIMEOUT, self.WRITE_TIMEOUT)
         self.device.purge()
+        self.device.enable_rx_event()
         
         self.connected = True
         
+        for ecu_id in self.UDS_ECU_IDS:
+            self._uds_header(ecu_id)
+        
         # Try to get device info
         self._get_device_info()
         
@@ -388,32 +564,102 @@ class PowerVisionInterface:
         return written == len(data)
     
     def receive_raw(self, timeout: float = 1.0) -> Optional[bytes]:
-        """Receive raw data from PowerVision"""
+        """
+        Receive raw data from PowerVision
+        
+        Returns as soon as one complete message is buffered. HDLC-style
+        frames (0x7E ... 0x7E) are unescaped and any bytes after the closing
+        marker stay in the receive buffer for the next call.
+        """
         if not self.connected:
             return None
         
         start = time.time()
-        data = bytearray()
-        
-        while time.time() - start < timeout:
+        buf = self._rx_buf
+        
+        while True:
+            # Check if we have a complete message
+            end = self._message_end(buf, self._rx_len)
+            if end > 0:
+                with memoryview(buf) as view:
+                    message = bytes(view[:end])
+                # Keep bytes after the message at the front of the buffer
+                remaining = self._rx_len - end
+                buf[:remaining] = buf[end:self._rx_len]
+                self._rx_len = remaining
+                if message[0] == self.FRAME_START:
+                    return self.unescape_frame(message)
+                return message
+            
+            if time.time() - start >= timeout:
+                break
+            
             available = self.device.get_queue_status()
             if available > 0:
                 chunk = self.device.read(available)
-                data.extend(chunk)
-                
-                # Check if we have a complete message
-                if self._is_complete_message(data):
-                    return bytes(data)
+                pos = self._rx_len
+                if pos + len(chunk) > len(buf):
+                    buf.extend(bytes(pos + len(chunk) - len(buf)))
+                buf[pos:pos + len(chunk)] = chunk
+                self._rx_len = pos + len(chunk)
             else:
-                time.sleep(0.01)
+                # Wakes as soon as the driver signals RX data (if enabled)
+                self.device.wait_rx(10)
+        
+        if not self._rx_len:
+            return None
         
-        return bytes(data) if data else None
+        with memoryview(buf) as view:
+            data = bytes(view[:self._rx_len])
+        self._rx_len = 0
+        return data
     
     def _is_complete_message(self, data: bytes) -> bool:
         """Check if received data is a complete message"""
-        # This depends on the PowerVision protocol
-        # For now, assume any data is complete
-        return len(data) > 0
+        return self._message_end(data) > 0
+    
+    def _message_end(self, data: bytes, length: int = None) -> int:
+        """
+        Length of the first complete message in data[:length], or -1
+        
+        Data starting with FRAME_START is framed and ends at the next
+        unescaped FRAME_START. Anything else is unframed and complete as-is.
+        """
+        n = len(data) if length is None else length
+        if not n:
+            return -1
+        if data[0] != self.FRAME_START:
+            return n
+        
+        i = 1
+        while i < n:
+            b = data[i]
+            if b == self.FRAME_ESCAPE:
+                i += 2
+                continue
+            # Back-to-back markers are idle flags, not an empty frame
+            if b == self.FRAME_START and i > 1 and data[i - 1] != self.FRAME_START:
+                return i + 1
+            i += 1
+        return -1
+    
+    @classmethod
+    def unescape_frame(cls, frame: bytes) -> bytes:
+        """Strip frame markers and undo 0x7D escaping (byte ^ 0x20)"""
+        if cls.FRAME_ESCAPE not in frame:
+            return frame.strip(bytes([cls.FRAME_START]))
+        
+        out = bytearray()
+        escaped = False
+        for b in frame:
+            if escaped:
+                out.append(b ^ 0x20)
+                escaped = False
+            elif b == cls.FRAME_ESCAPE:
+                escaped = True
+            elif b != cls.FRAME_START:
+                out.append(b)
+        return bytes(out)
     
     # =========================================================================
     # CAN Pass-through Mode
@@ -423,65 +669,89 @@ class PowerVisionInterface:
         """Initialize CAN interface through PowerVision"""
         # Send CAN init command to PowerVision
         # This is protocol-specific
-        cmd = bytes([PVCommand.CAN_INIT, 
-                    (bitrate >> 24) & 0xFF,
-                    (bitrate >> 16) & 0xFF,
-                    (bitrate >> 8) & 0xFF,
-                    bitrate & 0xFF])
-        
-        return self.send_raw(cmd)
+        return self.send_raw(_CAN_INIT_HDR.pack(PVCommand.CAN_INIT, bitrate & 0xFFFFFFFF))
     
     def can_send(self, can_id: int, data: bytes) -> bool:
         """Send CAN message through PowerVision"""
-        # Build CAN frame command
-        cmd = bytearray([PVCommand.CAN_SEND])
-        cmd.extend(struct.pack('>I', can_id))  # CAN ID (big endian)
-        cmd.append(len(data))  # DLC
-        cmd.extend(data)
-        
-        return self.send_raw(bytes(cmd))
+        # Build CAN frame command: cmd, CAN ID (big endian), DLC, data
+        return self.send_raw(_CAN_SEND_HDR.pack(_CAN_SEND, can_id, len(data)) + data)
     
     def can_receive(self, timeout: float = 1.0) -> Optional[Tuple[int, bytes]]:
         """Receive CAN message through PowerVision"""
-        response = self.receive_raw(timeout)
-        
-        if response and len(response) >= 6:
-            if response[0] == PVCommand.CAN_RECV:
-                can_id = struct.unpack('>I', response[1:5])[0]
-                dlc = response[5]
-                data = response[6:6+dlc]
-                return (can_id, bytes(data))
+        if not self._pending_frames:
+            self._pending_frames.extend(self.can_receive_many(timeout))
         
+        if self._pending_frames:
+            return self._pending_frames.popleft()
         return None
     
+    def can_receive_many(self, timeout: float = 1.0) -> List[Tuple[int, bytes]]:
+        """Receive all CAN messages delivered by the next USB read"""
+        if self._pending_frames:
+            frames = list(self._pending_frames)
+            self._pending_frames.clear()
+            return frames
+        
+        response = self.receive_raw(timeout)
+        return parse_can_frames(response) if response else []
+    
     # =========================================================================
     # UDS Communication
     # =========================================================================
     
+    def _uds_header(self, ecu_id: int) -> bytes:
+        """Get the (cached) UDS command prefix for an ECU"""
+        hdr = self._uds_hdr_cache.get(ecu_id)
+        if hdr is None:
+            hdr = _UDS_ECU_HDR.pack(_ECU_SEND_UDS, ecu_id)
+            self._uds_hdr_cache[ecu_id] = hdr
+        return hdr
+    
+    def tester_present(self) -> Optional[bytes]:
+        """Send UDS Tester Present to the ECU at 0x7E0 (prebuilt command)"""
+        return self._uds_exchange(_TESTER_PRESENT_7E0)
+    
     def uds_request(self, request: bytes, ecu_id: int = 0x7E0) -> Optional[bytes]:
         """
         Send UDS request and get response
         
         This sends through PowerVision which handles the ISO-TP framing
         """
-        # Build UDS request command
-        cmd = bytearray([PVCommand.ECU_SEND_UDS])
-        cmd.extend(struct.pack('>H', ecu_id))  # ECU CAN ID
-        cmd.extend(struct.pack('>H', len(request)))  # Request length
-        cmd.extend(request)
+        # UDS request command: cmd + ECU CAN ID (cached), request length, request
+        cmd = self._uds_header(ecu_id) + _UDS_LEN.pack(len(request)) + request
         
-        if not self.send_raw(bytes(cmd)):
+        return self._uds_exchange(cmd)
+    
+    def _uds_exchange(self, cmd: bytes) -> Optional[bytes]:
+        """Send a complete UDS command and return the response payload"""
+        if not self.send_raw(cmd):
             return None
         
-        # Wait for response
+        # Wait for response header (and whatever payload arrived with it)
         response = self.receive_raw(timeout=2.0)
         
-        if response and len(response) > 4:
-            if response[0] == PVCommand.ECU_RECV_UDS:
-                resp_len = struct.unpack('>H', response[1:3])[0]
-                return response[3:3+resp_len]
+        if not response or len(response) < _UDS_RESP_HDR.size:
+            return None
         
-        return None
+        resp_cmd, resp_len = _UDS_RESP_HDR.unpack_from(response, 0)
+        if resp_cmd != _ECU_RECV_UDS:
+            return None
+        
+        # Multi-frame (ISO-TP) responses can trail the header by tens of ms.
+        # Keep reading through receive_raw so the tail is delimited and
+        # unescaped like any other message, for up to READ_TIMEOUT
+        total = _UDS_RESP_HDR.size + resp_len
+        deadline = time.monotonic() + self.READ_TIMEOUT / 1000.0
+        while len(response) < total:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            more = self.receive_raw(timeout=remaining)
+            if not more:
+                return None
+            response += more
+        
+        return response[3:3+resp_len]
 
 
 # =============================================================================
@@ -506,6 +776,56 @@ except ImportError:
         timestamp: float = 0.0
 
 
+class RxRing:
+    """
+    Single-producer/single-consumer ring of received CAN frames
+    
+    Only the RX thread advances ``head`` and only the consumer advances
+    ``tail``, so push/pop never take a lock - a plain int store is atomic
+    under the GIL. Frame fields live in separate preallocated slot lists.
+    """
+    
+    def __init__(self, capacity: int = 4096):
+        if capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        self._mask = capacity - 1
+        self._ids = [0] * capacity
+        self._data = [b''] * capacity
+        self._timestamps = [0.0] * capacity
+        self.head = 0
+        self.tail = 0
+        self.overruns = 0
+    
+    def __len__(self) -> int:
+        return self.head - self.tail
+    
+    def push(self, can_id: int, data: bytes, timestamp: float) -> bool:
+        """Store a frame (RX thread only). Drops the frame if the ring is full."""
+        head = self.head
+        if head - self.tail > self._mask:
+            self.overruns += 1
+            return False
+        
+        slot = head & self._mask
+        self._ids[slot] = can_id
+        self._data[slot] = data
+        self._timestamps[slot] = timestamp
+        # Publish only after the slot is fully written
+        self.head = head + 1
+        return True
+    
+    def pop(self) -> Optional[Tuple[int, bytes, float]]:
+        """Take the oldest frame (consumer only), or None if empty"""
+        tail = self.tail
+        if tail == self.head:
+            return None
+        
+        slot = tail & self._mask
+        frame = (self._ids[slot], self._data[slot], self._timestamps[slot])
+        self.tail = tail + 1
+        return frame
+
+
 class PowerVisionCANInterface(CANInterface):
     """
     CAN interface implementation using PowerVision as the bridge
@@ -518,6 +838,9 @@ class PowerVisionCANInterface(CANInterface):
         super().__init__()
         self.pv = PowerVisionInterface()
         self.serial = serial
+        self.rx_ring = RxRing()
+        # Set by the RX thread after each push so receive() can block
+        self._rx_ready = threading.Event()
     
     def connect(self) -> bool:
         """Connect to PowerVision and initialize CAN"""
@@ -525,6 +848,7 @@ class PowerVisionCANInterface(CANInterface):
         
         if not devices:
             print("No PowerVision devices found")
+            PowerVisionInterface.invalidate_device_cache()
             return False
         
         # Connect to first device or specified serial
@@ -557,6 +881,43 @@ class PowerVisionCANInterface(CANInterface):
         """Send CAN message through PowerVision"""
         return self.pv.can_send(msg.arbitration_id, msg.data)
     
+    def receive(self, timeout: float = 1.0) -> Optional[CANMessage]:
+        """Receive CAN message from the RX ring (falls back to direct read)"""
+        if not (self._rx_thread and self._rx_thread.is_alive()):
+            return self._receive_internal(timeout)
+        
+        deadline = time.monotonic() + timeout
+        ready = self._rx_ready
+        while True:
+            frame = self.rx_ring.pop()
+            if frame is None:
+                # Clear, then look again: a push between the two pops has
+                # already set the event, so the wait below can't miss it
+                ready.clear()
+                frame = self.rx_ring.pop()
+            if frame:
+                can_id, data, timestamp = frame
+                return CANMessage(arbitration_id=can_id, data=data, timestamp=timestamp)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not ready.wait(remaining):
+                return None
+    
+    def _receiver_loop(self) -> None:
+        """Background receiver loop - producer side of the RX ring"""
+        raise_thread_priority()
+        
+        while self._running and self.connected:
+            for can_id, data in self.pv.can_receive_many(0.1):
+                timestamp = time.time()
+                self.rx_ring.push(can_id, data, timestamp)
+                self._rx_ready.set()
+                if self.rx_callback:
+                    self.rx_callback(CANMessage(
+                        arbitration_id=can_id,
+                        data=data,
+                        timestamp=timestamp
+                    ))
+    
     def _receive_internal(self, timeout: float) -> Optional[CANMessage]:
         """Receive CAN message from PowerVision"""
         result = self.pv.can_receive(timeout)
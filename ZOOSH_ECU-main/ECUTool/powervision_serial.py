@@ -8,6 +8,8 @@ Your PowerVision is detected on COM3 in Update Mode.
 
 import serial
 import serial.tools.list_ports
+import os
+import json
 import time
 import struct
 from typing import Optional, List, Tuple
@@ -44,8 +46,25 @@ class PowerVisionDevice:
     mode: str = "Unknown"
 
 
+# Port enumeration is slow and rarely changes - reuse results briefly
+DEVICE_CACHE_TTL = 3.0
+_DEV_CACHE: Tuple[float, list] = (0.0, [])
+
+
+def invalidate_device_cache():
+    """Forget cached port enumeration (e.g. after a failed connect)"""
+    global _DEV_CACHE
+    _DEV_CACHE = (0.0, [])
+
+
 def find_powervision_devices() -> List[PowerVisionDevice]:
     """Find all connected PowerVision devices"""
+    global _DEV_CACHE
+    
+    cached_at, cached = _DEV_CACHE
+    if cached and time.monotonic() - cached_at < DEVICE_CACHE_TTL:
+        return list(cached)
+    
     devices = []
     
     for port in serial.tools.list_ports.comports():
@@ -58,6 +77,7 @@ def find_powervision_devices() -> List[PowerVisionDevice]:
                 port=port.device,
                 description=port.description,
                 hwid=port.hwid,
+                serial_number=port.serial_number or "",
                 mode=mode
             ))
         # Also check for FTDI devices (PowerVision uses FTDI chip)
@@ -66,17 +86,51 @@ def find_powervision_devices() -> List[PowerVisionDevice]:
                 port=port.device,
                 description=port.description,
                 hwid=port.hwid,
+                serial_number=port.serial_number or "",
                 mode="FTDI"
             ))
     
-    return devices
+    _DEV_CACHE = (time.monotonic(), devices)
+    return list(devices)
+
+
+# Last working baud rate per device, so connect() can skip the sweep
+BAUD_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "powervision", "baud.json")
+
+
+def _device_key(port: str) -> str:
+    """Stable cache key for a port - USB serial number if known"""
+    for dev in find_powervision_devices():
+        if dev.port == port:
+            return dev.serial_number or dev.hwid or port
+    return port
+
+
+def load_baud_cache() -> dict:
+    """Load {device key: baud} map (empty if missing or unreadable)"""
+    try:
+        with open(BAUD_CACHE_FILE, 'r') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baud_cache(cache: dict):
+    """Persist {device key: baud} map, ignoring write failures"""
+    try:
+        os.makedirs(os.path.dirname(BAUD_CACHE_FILE), exist_ok=True)
+        with open(BAUD_CACHE_FILE, 'w') as f:
+            json.dump(cache, f, indent=2)
+    except OSError:
+        pass
 
 
 # =============================================================================
 # PowerVision Protocol Constants
 # =============================================================================
 
-class PVCmd:
+class PVCmd(IntEnum):
     """PowerVision command bytes (reverse engineered)"""
     # Frame markers
     START = 0x7E
@@ -104,6 +158,19 @@ class PVCmd:
     FLASH_ERASE = 0x33
 
 
+# Hot-path command bytes as plain ints (global lookup, no enum attribute access)
+_CAN_SEND = int(PVCmd.CAN_SEND)
+_ECU_REQUEST = int(PVCmd.ECU_REQUEST)
+_ECU_RESPONSE = int(PVCmd.ECU_RESPONSE)
+
+# Precompiled frame headers (cmd, CAN ID, DLC) / (cmd, ECU ID, length)
+_CAN_CONFIG_HDR = struct.Struct('>BI')
+_CAN_SEND_HDR = struct.Struct('>BIB')
+_CAN_RECV_HDR = struct.Struct('>BIB')
+_UDS_HDR = struct.Struct('>BHH')
+_UDS_RESP_HDR = struct.Struct('>BH')
+
+
 # =============================================================================
 # PowerVision Serial Connection
 # =============================================================================
@@ -116,6 +183,9 @@ class PowerVisionSerial:
     # Common PowerVision baud rates
     BAUD_RATES = [921600, 460800, 230400, 115200, 57600, 38400, 19200, 9600]
     
+    # Max wait for a ping reply
+    PING_TIMEOUT = 0.05
+    
     def __init__(self, port: str = None):
         self.port = port
         self.serial: Optional[serial.Serial] = None
@@ -136,7 +206,8 @@ class PowerVisionSerial:
         
         Args:
             port: COM port (e.g., "COM3"). Auto-detect if None.
-            baud: Baud rate (default 921600 for PowerVision)
+            baud: Baud rate (default 921600 for PowerVision). A rate that
+                  worked for this device before is tried first.
         """
         if port is None:
             port = self.find_device()
@@ -146,8 +217,16 @@ class PowerVisionSerial:
         
         self.port = port
         
-        # Try different baud rates if the default fails
-        for rate in [baud] + [r for r in self.BAUD_RATES if r != baud]:
+        # Try the last known-good rate first, then the rest if it fails
+        baud_cache = load_baud_cache()
+        key = _device_key(port)
+        rates = [baud] + [r for r in self.BAUD_RATES if r != baud]
+        known = baud_cache.get(key)
+        if known in rates:
+            rates.remove(known)
+            rates.insert(0, known)
+        
+        for rate in rates:
             try:
                 self.serial = serial.Serial(
                     port=port,
@@ -167,6 +246,9 @@ class PowerVisionSerial:
                 if self._ping():
                     self.connected = True
                     print(f"Connected to {port} at {rate} baud")
+                    if known != rate:
+                        baud_cache[key] = rate
+                        save_baud_cache(baud_cache)
                     return True
                 
                 self.serial.close()
@@ -175,6 +257,7 @@ class PowerVisionSerial:
                 print(f"Failed at {rate} baud: {e}")
                 continue
         
+        invalidate_device_cache()
         return False
     
     def disconnect(self):
@@ -188,13 +271,16 @@ class PowerVisionSerial:
         try:
             # Send a simple ping/status request
             # Actual protocol may vary
-            self.serial.write(bytes([0x00]))  # Simple ping
-            time.sleep(0.1)
-            
-            # Check if we got any response
-            if self.serial.in_waiting > 0:
-                response = self.serial.read(self.serial.in_waiting)
-                return len(response) > 0
+            timeout = self.serial.timeout
+            self.serial.timeout = self.PING_TIMEOUT
+            try:
+                self.serial.write(bytes([0x00]))  # Simple ping
+                
+                # Returns as soon as the first reply byte arrives
+                if self.serial.read(1) and self.serial.in_waiting > 0:
+                    self.serial.read(self.serial.in_waiting)
+            finally:
+                self.serial.timeout = timeout
             
             # Even without response, connection might be OK
             return True
@@ -208,8 +294,9 @@ class PowerVisionSerial:
             return False
         
         try:
+            # No flush here - pyserial hands the write to the kernel and the
+            # following read on the same port observes the ordering anyway
             written = self.serial.write(data)
-            self.serial.flush()
             return written == len(data)
         except:
             return False
@@ -263,26 +350,21 @@ class PowerVisionSerial:
         """
         # Build CAN config command
         # This is speculative - real protocol may differ
-        cmd = bytes([
-            PVCmd.CAN_CONFIG,
-            (bitrate >> 24) & 0xFF,
-            (bitrate >> 16) & 0xFF,
-            (bitrate >> 8) & 0xFF,
-            bitrate & 0xFF
-        ])
+        cmd = _CAN_CONFIG_HDR.pack(PVCmd.CAN_CONFIG, bitrate & 0xFFFFFFFF)
         
-        response = self.send_receive(cmd)
-        return response is not None
+        self.serial.reset_input_buffer()
+        if not self.send(cmd):
+            return False
+        
+        # Bitrate change must reach the device before anything else is sent
+        self.serial.flush()
+        
+        return self.receive() is not None
     
     def can_send(self, can_id: int, data: bytes) -> bool:
         """Send CAN frame through PowerVision"""
-        # Build CAN send command
-        cmd = bytearray([PVCmd.CAN_SEND])
-        cmd.extend(struct.pack('>I', can_id))  # CAN ID
-        cmd.append(len(data))  # DLC
-        cmd.extend(data)
-        
-        return self.send(bytes(cmd))
+        # Build CAN send command: cmd, CAN ID, DLC, data
+        return self.send(_CAN_SEND_HDR.pack(_CAN_SEND, can_id, len(data)) + data)
     
     def can_receive(self, timeout: float = 1.0) -> Optional[Tuple[int, bytes]]:
         """Receive CAN frame from PowerVision"""
@@ -291,8 +373,7 @@ class PowerVisionSerial:
         if response and len(response) >= 6:
             # Parse CAN frame
             # This format is speculative
-            can_id = struct.unpack('>I', response[1:5])[0]
-            dlc = response[5]
+            _, can_id, dlc = _CAN_RECV_HDR.unpack_from(response, 0)
             data = response[6:6+dlc]
             return (can_id, data)
         
@@ -304,16 +385,14 @@ class PowerVisionSerial:
         
         This uses PowerVision's ECU communication capability directly
         """
-        cmd = bytearray([PVCmd.ECU_REQUEST])
-        cmd.extend(struct.pack('>H', ecu_id))
-        cmd.extend(struct.pack('>H', len(service)))
-        cmd.extend(service)
+        cmd = _UDS_HDR.pack(_ECU_REQUEST, ecu_id, len(service)) + service
         
-        response = self.send_receive(bytes(cmd), timeout=3.0)
+        response = self.send_receive(cmd, timeout=3.0)
         
-        if response and response[0] == PVCmd.ECU_RESPONSE:
-            length = struct.unpack('>H', response[1:3])[0]
-            return response[3:3+length]
+        if response and len(response) >= 3:
+            cmd_byte, length = _UDS_RESP_HDR.unpack_from(response, 0)
+            if cmd_byte == _ECU_RESPONSE:
+                return response[3:3+length]
         
         return None
 
@@ -8,11 +8,35 @@ to understand the memory mapping between read and write addresses.
 Also extracts the actual write data from a capture file for comparison.
 """
 
+import operator
 import os
 import re
 import sys
 from datetime import datetime
 
+# NumPy is optional - used to vectorize the byte comparisons
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# FFT scoring costs two FFTs per distinct byte value in the write data;
+# above this many values the direct sliding-window compare is faster
+FFT_MAX_SYMBOLS = 64
+
+# Offsets scored per sliding-window batch (bounds the temporary array)
+WINDOW_BATCH = 64
+
+# TX frames to the ECU (0x7E0, DLC 8) in a capture file
+_TX_RE = re.compile(r'0x7E0\s+8\s+([0-9A-Fa-f]{16})')
+
+# RequestDownload First Frame: PCI + length 11, SID 0x34 (bytes 0-2) ...
+_REQ_DL_FF = b'\x10\x0B\x34'
+# ... and the high address bytes of 0x4000 (bytes 5-7); 3-4 are format bytes
+_REQ_DL_ADDR_4000 = b'\x00\x00\x40'
+
 
 def extract_write_data_from_capture(capture_file):
     """
@@ -24,59 +48,66 @@ def extract_write_data_from_capture(capture_file):
     """
     print(f"[*] Extracting write data from: {capture_file}")
     
+    # Find all TX messages to 0x7E0 (captures are one frame per line)
+    matches = []
     with open(capture_file, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-    
-    # Find all TX messages to 0x7E0
-    pattern = r'0x7E0\s+8\s+([0-9A-Fa-f]{16})'
-    matches = re.findall(pattern, content)
+        for line in f:
+            m = _TX_RE.search(line)
+            if m:
+                matches.append(m.group(1))
     
     # Look for the data write sequence (after 2nd auth, to address 0x4000)
     # Pattern: RequestDownload to 0x4000 followed by TransferData blocks
     
     data_blocks = []
     collecting = False
-    current_block = bytearray()
+    # One preallocated block buffer; write_pos > 0 while a block is in progress
+    current_block = bytearray(256)
+    block_view = memoryview(current_block)
+    write_pos = 0
     block_seq = 0
     expected_seq = 1
     
-    for i, match in enumerate(matches):
-        frame = bytes.fromhex(match)
+    # Decode every frame in one call; rows are zero-copy 8-byte views
+    frames = memoryview(bytes.fromhex(''.join(matches)))
+    
+    for i in range(len(matches)):
+        frame = frames[i * 8:i * 8 + 8]
         pci = frame[0]
         
-        # Look for RequestDownload to 0x4000 (FF: 10 0B 34 00 44 00 00 40 00)
-        if (pci & 0xF0) == 0x10:  # First Frame
-            total_len = ((pci & 0x0F) << 8) | frame[1]
-            if total_len == 11 and frame[2] == 0x34:  # RequestDownload
-                # Check if address is 0x4000
-                # Full message: 34 00 44 00 00 40 00 00 00 40 00
-                # We have bytes 2-7 in FF, need to check
-                if frame[5] == 0x00 and frame[6] == 0x00 and frame[7] == 0x40:
-                    print(f"    Found RequestDownload to 0x4000 at message {i}")
-                    collecting = True
-                    data_blocks = []
-                    expected_seq = 1
-                    continue
+        frame_type = pci & 0xF0
         
-        # Collect TransferData First Frames (len=258 for data blocks)
-        if collecting and (pci & 0xF0) == 0x10:
+        if frame_type == 0x10:  # First Frame
             total_len = ((pci & 0x0F) << 8) | frame[1]
-            if total_len == 258 and frame[2] == 0x36:  # TransferData
+            
+            # Look for RequestDownload to 0x4000 (FF: 10 0B 34 00 44 00 00 40 00)
+            # Full message: 34 00 44 00 00 40 00 00 00 40 00
+            # We have bytes 2-7 in FF - compared as two constant slices
+            if frame[:3] == _REQ_DL_FF and frame[5:8] == _REQ_DL_ADDR_4000:
+                print(f"    Found RequestDownload to 0x4000 at message {i}")
+                collecting = True
+                data_blocks = []
+                expected_seq = 1
+                continue
+            
+            # Collect TransferData First Frames (len=258 for data blocks)
+            if collecting and total_len == 258 and frame[2] == 0x36:  # TransferData
                 block_seq = frame[3]
                 if block_seq == expected_seq or (expected_seq > 255 and block_seq == 1):
-                    current_block = bytearray(frame[4:8])  # First 4 bytes of data
+                    block_view[0:4] = frame[4:8]  # First 4 bytes of data
+                    write_pos = 4
                     expected_seq = (block_seq % 255) + 1 if block_seq < 64 else block_seq + 1
-                continue
         
         # Collect Consecutive Frames
-        if collecting and (pci & 0xF0) == 0x20 and len(current_block) > 0:
-            cf_seq = pci & 0x0F
-            current_block.extend(frame[1:8])
+        elif frame_type == 0x20 and collecting and write_pos:
+            # 4 + 7*n lands exactly on 256, so a CF never runs past the buffer
+            block_view[write_pos:write_pos + 7] = frame[1:8]
+            write_pos += 7
             
             # Check if block complete (256 bytes)
-            if len(current_block) >= 256:
-                data_blocks.append(bytes(current_block[:256]))
-                current_block = bytearray()
+            if write_pos >= 256:
+                data_blocks.append(bytes(current_block))
+                write_pos = 0
                 
                 if len(data_blocks) % 10 == 0:
                     print(f"    Extracted {len(data_blocks)} blocks...")
@@ -95,18 +126,71 @@ def find_pattern_in_dump(dump_data, pattern, pattern_name="pattern"):
     Find where a pattern appears in the dump data.
     """
     matches = []
-    pattern_len = len(pattern)
+    start = 0
     
-    for i in range(len(dump_data) - pattern_len + 1):
-        if dump_data[i:i+pattern_len] == pattern:
-            matches.append(i)
+    # bytes.find runs the substring search in C - no per-offset slice
+    while True:
+        i = dump_data.find(pattern, start)
+        if i < 0:
+            break
+        matches.append(i)
+        start = i + 1  # Overlapping matches are reported too
     
     return matches
 
 
-def compare_regions(dump_data, write_data):
+def _match_counts(dump, write):
+    """
+    Count matching bytes of write at every offset into dump.
+    """
+    values = np.unique(write)
+    if len(values) <= FFT_MAX_SYMBOLS:
+        return _match_counts_fft(dump, write, values)
+    return _match_counts_direct(dump, write)
+
+
+def _match_counts_direct(dump, write):
+    """
+    Exact match counts from a sliding-window view of the dump.
+    
+    Each batch compares WINDOW_BATCH overlapping windows against write
+    in one broadcast ufunc call - no copies of the dump are made.
+    """
+    windows = sliding_window_view(dump, len(write))
+    scores = np.empty(len(windows), dtype=np.int64)
+    
+    for start in range(0, len(windows), WINDOW_BATCH):
+        batch = windows[start:start + WINDOW_BATCH]
+        # Matching bytes per window: one broadcast compare, summed per row
+        scores[start:start + len(batch)] = (batch == write).sum(axis=1)
+    
+    return scores
+
+
+def _match_counts_fft(dump, write, values):
+    """
+    Match counts via FFT cross-correlation - fast for few distinct bytes.
+    
+    Sum over the byte values v in write of the cross-correlation of (dump == v) with
+    (write == v), done in the frequency domain. Only valid lags are kept,
+    so an FFT the length of the dump never wraps. Rounding makes it exact.
+    """
+    n = len(dump)
+    acc = np.zeros(n // 2 + 1, dtype=np.complex128)
+    
+    for v in values:
+        acc += np.fft.rfft(dump == v) * np.conj(np.fft.rfft(write == v, n))
+    
+    corr = np.fft.irfft(acc, n)[:n - len(write) + 1]
+    return np.rint(corr).astype(np.int64)
+
+
+def compare_regions(dump_data, write_data, dump_arr=None, write_arr=None):
     """
     Compare write data against all possible 16KB regions in the dump.
+    
+    dump_arr/write_arr are optional uint8 views of the same buffers, so
+    callers that already hold them don't convert the data again.
     """
     write_len = len(write_data)
     dump_len = len(dump_data)
@@ -117,26 +201,44 @@ def compare_regions(dump_data, write_data):
     best_match_offset = -1
     best_match_score = 0
     
-    # Check every possible offset
-    for offset in range(0, dump_len - write_len + 1, 256):  # Check every 256 bytes
-        matches = sum(1 for i in range(write_len) if dump_data[offset + i] == write_data[i])
-        score = matches / write_len * 100
+    if HAS_NUMPY and 0 < write_len <= dump_len:
+        # Score every byte offset at once
+        if dump_arr is None:
+            dump_arr = np.frombuffer(dump_data, dtype=np.uint8)
+        if write_arr is None:
+            write_arr = np.frombuffer(write_data, dtype=np.uint8)
+        scores = _match_counts(dump_arr, write_arr)
+        
+        for offset in np.flatnonzero(scores * 100 > 90 * write_len):
+            print(f"    High match at offset 0x{offset:X}: {scores[offset] / write_len * 100:.1f}%")
         
-        if score > best_match_score:
-            best_match_score = score
-            best_match_offset = offset
+        best_match_offset = int(scores.argmax())
+        best_match_score = int(scores[best_match_offset]) / write_len * 100
+    elif write_len <= dump_len:
+        # Without NumPy an exhaustive search is too slow - check every 256 bytes
+        offsets = range(0, dump_len - write_len + 1, 256)
+        scores = [sum(map(operator.eq, dump_data[offset:offset + write_len], write_data))
+                  for offset in offsets]
         
-        if score > 90:
-            print(f"    High match at offset 0x{offset:X}: {score:.1f}%")
+        for offset, matches in zip(offsets, scores):
+            if matches * 100 > 90 * write_len:
+                print(f"    High match at offset 0x{offset:X}: {matches / write_len * 100:.1f}%")
+        
+        if write_len:
+            best = max(range(len(scores)), key=scores.__getitem__)
+            best_match_offset = offsets[best]
+            best_match_score = scores[best] / write_len * 100
     
     print(f"\n    Best match: offset 0x{best_match_offset:X} ({best_match_score:.1f}% match)")
     
     return best_match_offset, best_match_score
 
 
-def analyze_write_data(write_data):
+def analyze_write_data(write_data, write_arr=None):
     """
     Analyze the structure of write data.
+    
+    write_arr is an optional uint8 view of write_data (see compare_regions).
     """
     print(f"\n[*] Analyzing write data structure ({len(write_data)} bytes)")
     
@@ -144,10 +246,18 @@ def analyze_write_data(write_data):
     print(f"    First 32 bytes: {write_data[:32].hex()}")
     print(f"    Last 32 bytes:  {write_data[-32:].hex()}")
     
+    if HAS_NUMPY and write_arr is None:
+        write_arr = np.frombuffer(write_data, dtype=np.uint8)
+    
     # Count 0xFF bytes (often padding/unused)
-    ff_count = write_data.count(0xFF)
-    fe_count = write_data.count(0xFE)
-    zero_count = write_data.count(0x00)
+    if HAS_NUMPY:
+        # One pass for the full byte histogram
+        hist = np.bincount(write_arr, minlength=256)
+        ff_count, fe_count, zero_count = int(hist[0xFF]), int(hist[0xFE]), int(hist[0x00])
+    else:
+        ff_count = write_data.count(0xFF)
+        fe_count = write_data.count(0xFE)
+        zero_count = write_data.count(0x00)
     
     print(f"    0xFF bytes: {ff_count} ({ff_count*100//len(write_data)}%)")
     print(f"    0xFE bytes: {fe_count} ({fe_count*100//len(write_data)}%)")
@@ -155,16 +265,21 @@ def analyze_write_data(write_data):
     
     # Find distinct regions
     print("\n    Scanning for region boundaries...")
-    last_byte = write_data[0]
     region_start = 0
     regions = []
     
-    for i, b in enumerate(write_data):
-        if abs(b - last_byte) > 64:  # Significant change
-            if i - region_start > 16:  # Minimum region size
-                regions.append((region_start, i, write_data[region_start]))
-            region_start = i
-        last_byte = b
+    if HAS_NUMPY:
+        # Indices where the byte value jumps by more than 64 from the previous one
+        diffs = np.diff(write_arr.astype(np.int16))
+        boundaries = (np.flatnonzero(np.abs(diffs) > 64) + 1).tolist()
+    else:
+        boundaries = [i for i in range(1, len(write_data))
+                      if abs(write_data[i] - write_data[i - 1]) > 64]
+    
+    for i in boundaries:  # Significant change
+        if i - region_start > 16:  # Minimum region size
+            regions.append((region_start, i, write_data[region_start]))
+        region_start = i
     
     if len(write_data) - region_start > 16:
         regions.append((region_start, len(write_data), write_data[region_start]))
@@ -242,11 +357,17 @@ def main():
         f.write(write_data)
     print(f"[+] Saved extracted write data: {write_file}")
     
+    # Zero-copy uint8 views shared by both passes
+    dump_arr = write_arr = None
+    if HAS_NUMPY:
+        dump_arr = np.frombuffer(dump_data, dtype=np.uint8)
+        write_arr = np.frombuffer(write_data, dtype=np.uint8)
+    
     # Analyze write data
-    analyze_write_data(write_data)
+    analyze_write_data(write_data, write_arr)
     
     # Compare with dump
-    offset, score = compare_regions(dump_data, write_data)
+    offset, score = compare_regions(dump_data, write_data, dump_arr, write_arr)
     
     print()
     print("=" * 70)
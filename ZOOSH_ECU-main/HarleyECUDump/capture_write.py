@@ -26,6 +26,16 @@ CAN_INTERFACE = 'pcan'
 CAN_CHANNEL = 'PCAN_USBBUS1'
 CAN_BITRATE = 500000
 
+# Capture lines go through a large file buffer to keep file I/O off the
+# recv path; it is flushed with every progress update
+CAPTURE_FILE_BUFFER = 65536
+
+# Diagnostic CAN IDs that are decoded and logged
+DIAG_IDS = frozenset((0x7E0, 0x7E8, 0x7DF))
+
+# Progress line interval (ms)
+PROGRESS_INTERVAL_MS = 5000
+
 # Known patterns to identify
 PATTERNS = {
     0x34: "RequestDownload (Write setup)",
@@ -40,79 +50,98 @@ PATTERNS = {
 }
 
 
+def _tx_single(data):
+    svc = data[1]
+    info = PATTERNS.get(svc, f"Svc 0x{svc:02X}")
+    if svc == 0x34:
+        if len(data) >= 4:
+            info += f" addr_fmt=0x{data[3]:02X}"
+    elif svc == 0x35:
+        if len(data) >= 7:
+            addr = int.from_bytes(data[4:8], 'big')
+            info += f" @ 0x{addr:08X}"
+    return info
+
+
+def _tx_first(data):
+    length = ((data[0] & 0x0F) << 8) | data[1]
+    svc = data[2]
+    info = f"[FF len={length}] {PATTERNS.get(svc, f'Svc 0x{svc:02X}')}"
+    if svc == 0x34:
+        info += " *** WRITE SETUP ***"
+    elif svc == 0x36:
+        info += " *** DATA TRANSFER ***"
+    return info
+
+
+# Positive responses worth calling out in the capture
+RX_RESPONSES = {
+    0x74: "RequestDownload+ *** WRITE ACCEPTED ***",
+    0x75: "RequestUpload+",
+    0x76: "TransferData+",
+    0x77: "TransferExit+",
+}
+
+
+def _rx_single(data):
+    svc = data[1]
+    if svc == 0x7F:
+        nrc = data[3] if len(data) > 3 else 0
+        return f"NRC 0x{nrc:02X}"
+    return RX_RESPONSES.get(svc) or f"Response 0x{svc:02X}"
+
+
+def _rx_first(data):
+    length = ((data[0] & 0x0F) << 8) | data[1]
+    return f"[FF len={length}]"
+
+
+def _consecutive(data):
+    return f"[CF{data[0] & 0x0F}]"
+
+
+def _flow_control(data):
+    return "[FC]"
+
+
+def _broadcast_single(data):
+    if len(data) >= 2:
+        svc = data[1]
+        return PATTERNS.get(svc, f"Svc 0x{svc:02X}")
+    return ""
+
+
+# Display prefix per diagnostic CAN ID
+FRAME_PREFIXES = {
+    0x7E0: "TX->ECU ",
+    0x7E8: "ECU-> ",
+    0x7DF: "Broadcast ",
+}
+
+# (CAN ID, ISO-TP frame type) -> decoder; one lookup per frame
+_FRAME_DECODERS = {
+    (0x7E0, 0x00): _tx_single,
+    (0x7E0, 0x10): _tx_first,
+    (0x7E0, 0x20): _consecutive,
+    (0x7E0, 0x30): _flow_control,
+    (0x7E8, 0x00): _rx_single,
+    (0x7E8, 0x10): _rx_first,
+    (0x7E8, 0x20): _consecutive,
+    (0x7E8, 0x30): _flow_control,
+    (0x7DF, 0x00): _broadcast_single,
+}
+
+
 def decode_frame(can_id, data):
     """Decode a CAN frame for display"""
-    info = ""
-    
-    if can_id == 0x7E0:
-        info = "TX->ECU "
-        pci = data[0]
-        
-        if (pci & 0xF0) == 0x00:  # Single frame
-            svc = data[1]
-            info += PATTERNS.get(svc, f"Svc 0x{svc:02X}")
-            if svc == 0x34:
-                if len(data) >= 4:
-                    info += f" addr_fmt=0x{data[3]:02X}"
-            elif svc == 0x35:
-                if len(data) >= 7:
-                    addr = int.from_bytes(data[4:8], 'big')
-                    info += f" @ 0x{addr:08X}"
-        
-        elif (pci & 0xF0) == 0x10:  # First frame
-            length = ((pci & 0x0F) << 8) | data[1]
-            svc = data[2]
-            info += f"[FF len={length}] {PATTERNS.get(svc, f'Svc 0x{svc:02X}')}"
-            if svc == 0x34:
-                info += " *** WRITE SETUP ***"
-            elif svc == 0x36:
-                info += " *** DATA TRANSFER ***"
-        
-        elif (pci & 0xF0) == 0x20:  # Consecutive frame
-            seq = pci & 0x0F
-            info += f"[CF{seq}]"
-        
-        elif (pci & 0xF0) == 0x30:  # Flow control
-            info += "[FC]"
-    
-    elif can_id == 0x7E8:
-        info = "ECU-> "
-        pci = data[0]
-        
-        if (pci & 0xF0) == 0x00:  # Single frame
-            svc = data[1]
-            if svc == 0x7F:
-                nrc = data[3] if len(data) > 3 else 0
-                info += f"NRC 0x{nrc:02X}"
-            elif svc == 0x74:
-                info += "RequestDownload+ *** WRITE ACCEPTED ***"
-            elif svc == 0x75:
-                info += "RequestUpload+"
-            elif svc == 0x76:
-                info += "TransferData+"
-            elif svc == 0x77:
-                info += "TransferExit+"
-            else:
-                info += f"Response 0x{svc:02X}"
-        
-        elif (pci & 0xF0) == 0x10:
-            length = ((pci & 0x0F) << 8) | data[1]
-            info += f"[FF len={length}]"
-        
-        elif (pci & 0xF0) == 0x20:
-            seq = pci & 0x0F
-            info += f"[CF{seq}]"
-        
-        elif (pci & 0xF0) == 0x30:
-            info += "[FC]"
+    prefix = FRAME_PREFIXES.get(can_id)
+    if prefix is None:
+        return ""
+    if not data:
+        return prefix
     
-    elif can_id == 0x7DF:
-        info = "Broadcast "
-        if len(data) >= 2 and (data[0] & 0xF0) == 0x00:
-            svc = data[1]
-            info += PATTERNS.get(svc, f"Svc 0x{svc:02X}")
-    
-    return info
+    decoder = _FRAME_DECODERS.get((can_id, data[0] & 0xF0))
+    return prefix + decoder(data) if decoder else prefix
 
 
 def main():
@@ -152,7 +181,11 @@ def main():
     print("-" * 70)
     
     messages = []
-    start_time = time.time()
+    
+    # Receive on python-can's notifier thread; the loop drains the buffer
+    reader = can.BufferedReader()
+    notifier = can.Notifier(bus, [reader])
+    start_ns = time.monotonic_ns()
     
     # Track statistics
     stats = defaultdict(int)
@@ -160,22 +193,19 @@ def main():
     data_transfers = 0
     
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with open(output_file, 'w', encoding='utf-8', buffering=CAPTURE_FILE_BUFFER) as f:
             f.write(f"# PowerVision WRITE Capture\n")
             f.write(f"# Date: {datetime.now().isoformat()}\n")
             f.write(f"# Looking for write protocol patterns\n\n")
             
+            next_progress = PROGRESS_INTERVAL_MS
             while True:
-                msg = bus.recv(timeout=0.1)
+                msg = reader.get_message(timeout=0.1)
                 if not msg:
                     continue
                 
-                elapsed = int((time.time() - start_time) * 1000)
+                elapsed = (time.monotonic_ns() - start_ns) // 1_000_000
                 data = bytes(msg.data[:msg.dlc])
-                data_hex = data.hex()
-                
-                # Decode
-                info = decode_frame(msg.arbitration_id, data)
                 
                 # Track important events
                 if msg.arbitration_id == 0x7E0:
@@ -201,27 +231,32 @@ def main():
                             print(f"\n*** TRANSFER EXIT - WRITE COMPLETE? ***")
                 
                 # Only log diagnostic traffic
-                if msg.arbitration_id in [0x7E0, 0x7E8, 0x7DF]:
-                    line = f"{elapsed:10d}  0x{msg.arbitration_id:03X}  {msg.dlc}  {data_hex:<16}  {info}"
+                if msg.arbitration_id in DIAG_IDS:
+                    # Decode (other IDs are never formatted)
+                    info = decode_frame(msg.arbitration_id, data)
+                    line = f"{elapsed:10d}  0x{msg.arbitration_id:03X}  {msg.dlc}  {data.hex():<16}  {info}"
                     f.write(line + "\n")
                     
                     # Print important frames
                     if "***" in info or "NRC" in info:
                         print(line)
-                    elif elapsed % 5000 < 100:  # Progress every 5 seconds
+                    elif elapsed >= next_progress:  # Progress every 5 seconds
+                        next_progress = elapsed + PROGRESS_INTERVAL_MS
+                        f.flush()
                         print(f"\r[{elapsed/1000:.1f}s] TX:{stats['tx']} RX:{stats['rx']} Writes:{write_setups} Transfers:{data_transfers}", end='', flush=True)
     
     except KeyboardInterrupt:
         print(f"\n\n[!] Capture stopped")
     
     finally:
+        notifier.stop()
         bus.shutdown()
     
     # Summary
     print(f"\n{'='*70}")
     print("Capture Summary")
     print(f"{'='*70}")
-    print(f"Duration: {(time.time() - start_time):.1f} seconds")
+    print(f"Duration: {(time.monotonic_ns() - start_ns) / 1e9:.1f} seconds")
     print(f"TX messages: {stats['tx']}")
     print(f"RX messages: {stats['rx']}")
     print(f"Write setups (0x34): {write_setups}")
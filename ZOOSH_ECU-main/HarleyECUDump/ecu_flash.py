@@ -16,11 +16,19 @@ WARNING: Writing incorrect data can BRICK your ECU!
 """
 
 import can
+import gc
 import time
 import sys
 import os
+import mmap
+import queue
+import re
 import struct
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Optional
 
 # Import from our main tool
 from harley_ecu_dump import HarleyECU, TX_PHYSICAL, TX_FUNCTIONAL, RX_ECU
@@ -30,11 +38,314 @@ WRITE_ADDRESS = 0x00004000   # Write destination (from capture: 340044000040...)
 WRITE_LENGTH = 0x4000        # 16KB - matches capture
 BLOCK_SIZE = 256             # Bytes per TransferData block (258 total with header)
 MAX_RETRIES = 3
+RETRY_BACKOFF = 0.01         # First retry delay in seconds, doubled on each retry
+PROGRESS_INTERVAL = 0.1      # Seconds between progress line updates (~10 Hz)
+KEEPALIVE_INTERVAL = 2.0     # Seconds between TesterPresent during flash (S3 is ~5s)
+
+# TransferData response timing: the ECU may program flash before its first
+# reply without sending 7F 36 78 first, so that wait keeps the full 2s (a
+# short P2 would resend a block whose late 76 [seq] the retry can't tell
+# apart). P2* applies after each 7F xx 78 responsePending
+TRANSFER_TIMEOUT = 2.0
+P2_STAR_TIMEOUT = 5.0
+
+# Every full TransferData message is 36 [seq] + BLOCK_SIZE bytes: one First
+# Frame carrying 6 bytes, then 36 full 7-byte Consecutive Frames (252 = 36*7)
+TRANSFER_MSG_LEN = BLOCK_SIZE + 2
+TRANSFER_CF_COUNT = (TRANSFER_MSG_LEN - 6) // 7
+_TRANSFER_FF_PCI = bytes([0x10 | (TRANSFER_MSG_LEN >> 8), TRANSFER_MSG_LEN & 0xFF])
+_TRANSFER_CF_PCI = bytes(0x20 | (seq & 0x0F) for seq in range(1, TRANSFER_CF_COUNT + 1))
+
+# TX frames to the ECU in a capture file: "<ms>  0x7E0  <dlc>  <16 hex>  TX->ECU"
+_CAPTURE_TX_RE = re.compile(
+    rb'^(?=[^\n]*TX)[^\n]*?0x7E0[^\S\n]+\d+[^\S\n]+([0-9a-fA-F]{16})', re.MULTILINE)
+
+# Negative response codes seen on the download / transfer path
+NRC_NAMES = types.MappingProxyType({
+    0x13: "Incorrect message length",
+    0x22: "Conditions not correct",
+    0x24: "Request sequence error",
+    0x31: "Request out of range",
+    0x33: "Security access denied",
+    0x70: "Upload/download not accepted",
+    0x71: "Transfer data suspended",
+    0x72: "General programming failure",
+    0x73: "Wrong block sequence counter",
+})
 
 
 class HarleyFlasher(HarleyECU):
     """ECU Flash handler"""
     
+    def __init__(self):
+        super().__init__()
+        # A dispatcher thread owns bus.recv() while connected and routes ECU
+        # frames: Flow Control STmin -> _fc_q, complete responses -> _resp_q
+        self._fc_q: queue.Queue = queue.Queue()
+        self._resp_q: queue.Queue = queue.Queue()
+        self._rx_stop = threading.Event()
+        self._rx_thread: Optional[threading.Thread] = None
+        # Set by the dispatcher if bus.recv fails; the flash stops on it
+        self._rx_error: Optional[Exception] = None
+        # Reused TransferData frames: the PCI bytes are stamped once and only
+        # the payload bytes change per block (the driver copies on send)
+        self._transfer_frames = [
+            can.Message(arbitration_id=TX_PHYSICAL, data=pci.ljust(8, b'\x00'), is_extended_id=False)
+            for pci in [_TRANSFER_FF_PCI] + [bytes([cf]) for cf in _TRANSFER_CF_PCI]
+        ]
+        # Reused 36 [seq] [data...] buffer for transfer_data_write
+        self._tx_buf = bytearray(TRANSFER_MSG_LEN)
+        self._tx_mv = memoryview(self._tx_buf)
+        self._last_print = 0.0
+        # Serializes request/response exchanges with the keep-alive thread
+        self._bus_lock = threading.Lock()
+        # Serializes individual bus.send calls across all threads; the
+        # dispatcher's Flow Control can't wait on _bus_lock, which is held
+        # while the exchange it belongs to waits for its response
+        self._send_lock = threading.Lock()
+        self._keepalive_stop = threading.Event()
+        self._keepalive_thread: Optional[threading.Thread] = None
+        # Opt-in (--realtime): SCHED_FIFO for the flashing thread during blocks
+        self.realtime = False
+    
+    def connect(self) -> bool:
+        """Connect to PCAN and start the receive dispatcher"""
+        if not super().connect():
+            return False
+        self._start_rx()
+        return True
+    
+    def disconnect(self):
+        """Stop the receive dispatcher and disconnect"""
+        if self._rx_thread:
+            self._rx_stop.set()
+            self._rx_thread.join()
+            self._rx_thread = None
+        super().disconnect()
+    
+    def load_auth_payload(self, capture_file: str) -> bool:
+        """Extract auth payload from capture file (regex scan over a memory map)"""
+        print(f"\n[AUTH] Loading auth payload from: {capture_file}")
+        
+        try:
+            with open(capture_file, 'rb') as f:
+                try:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        hex_frames = _CAPTURE_TX_RE.findall(mm)
+                except ValueError:  # Empty files can't be mapped
+                    hex_frames = []
+        except FileNotFoundError:
+            self.log(f"File not found: {capture_file}", "fail")
+            return False
+        
+        # Decode every TX frame in one call
+        frames = bytes.fromhex(b''.join(hex_frames).decode('ascii'))
+        
+        payload = bytearray()
+        in_transfer = False
+        expected_len = 0
+        
+        for pos in range(0, len(frames), 8):
+            frame = frames[pos:pos + 8]
+            pci = frame[0]
+            
+            # First Frame with TransferData (0x36)
+            if (pci & 0xF0) == 0x10:
+                if frame[2] == 0x36:
+                    in_transfer = True
+                    expected_len = ((pci & 0x0F) << 8) | frame[1]
+                    payload = bytearray(frame[2:8])
+            
+            # Consecutive Frames
+            elif (pci & 0xF0) == 0x20 and in_transfer:
+                payload.extend(frame[1:8])
+                if len(payload) >= expected_len:
+                    payload = payload[:expected_len]
+                    break
+        
+        if len(payload) >= 2000:
+            self.auth_payload = bytes(payload)
+            print(f"    [OK] Loaded {len(payload)} bytes")
+            return True
+        else:
+            self.log(f"Could not extract payload (got {len(payload)} bytes)", "fail")
+            return False
+    
+    def _start_rx(self):
+        self._rx_stop.clear()
+        self._rx_error = None
+        self._rx_thread = threading.Thread(target=self._rx_pump, daemon=True)
+        self._rx_thread.start()
+    
+    def _rx_pump(self):
+        """Dispatcher thread: pull frames off the bus and reassemble ECU responses"""
+        pdu = None      # Response buffer, sized from the First Frame length
+        pdu_view = None
+        pos = 0
+        next_sn = 1     # Sequence number the next Consecutive Frame must carry
+        
+        while not self._rx_stop.is_set():
+            try:
+                msg = self.bus.recv(timeout=0.01)
+                if not msg or msg.arbitration_id != RX_ECU:
+                    continue
+                
+                data = msg.data
+                pci = data[0] & 0xF0
+                
+                if pci == 0x00:  # Single frame
+                    length = data[0] & 0x0F
+                    if data[1] != 0x7E:  # Nothing waits for TesterPresent replies
+                        self._resp_q.put(bytes(data[1:1+length]))
+                
+                elif pci == 0x30:  # Flow Control for one of our multi-frames
+                    self._fc_q.put(data[2])
+                
+                elif pci == 0x10:  # First frame of a multi-frame response
+                    total_len = ((data[0] & 0x0F) << 8) | data[1]
+                    # Room for whole CFs past total_len; trimmed on completion
+                    pdu = bytearray(total_len + 7)
+                    pdu_view = memoryview(pdu)
+                    chunk = data[2:8]
+                    pdu_view[0:len(chunk)] = chunk
+                    pos = len(chunk)
+                    next_sn = 1
+                    self.send_frame(TX_PHYSICAL, bytes([0x30, 0x00, 0x0A, 0x00, 0x00, 0x00, 0x00, 0x00]))
+                
+                elif pci == 0x20 and pdu is not None:  # Consecutive frame
+                    if data[0] & 0x0F != next_sn:
+                        # Lost or repeated CF - the rest would land shifted
+                        self.log(f"CF sequence {data[0] & 0x0F} (expected {next_sn}), response dropped", "debug")
+                        pdu = pdu_view = None
+                        continue
+                    next_sn = (next_sn + 1) & 0x0F
+                    chunk = data[1:8]
+                    pdu_view[pos:pos + len(chunk)] = chunk
+                    pos += len(chunk)
+                    if pos >= total_len:
+                        self._resp_q.put(bytes(pdu_view[:total_len]))
+                        pdu = pdu_view = None
+            
+            except Exception as e:
+                self._rx_error = e
+                self.log(f"Receive dispatcher stopped: {e}", "fail")
+                # Wake anything waiting so it sees the failure right away
+                self._fc_q.put(None)
+                self._resp_q.put(None)
+                return
+    
+    @staticmethod
+    def _build_frames(tx_id: int, payload) -> list:
+        """Split a payload into its ISO-TP First Frame and Consecutive Frames"""
+        total_len = len(payload)
+        raw = [bytes([(0x10 | (total_len >> 8)), total_len & 0xFF]) + bytes(payload[:6])]
+        for seq, pos in enumerate(range(6, total_len, 7), 1):
+            raw.append(bytes([0x20 | (seq & 0x0F)]) + bytes(payload[pos:pos + 7]))
+        return [can.Message(arbitration_id=tx_id, data=d.ljust(8, b'\x00'), is_extended_id=False)
+                for d in raw]
+    
+    def _build_transfer_frames(self, msg) -> list:
+        """Split a full TRANSFER_MSG_LEN TransferData message using the fixed layout"""
+        frames = self._transfer_frames
+        frames[0].data[2:8] = msg[0:6]
+        src = 6
+        for frame in frames[1:]:
+            frame.data[1:8] = msg[src:src + 7]
+            src += 7
+        return frames
+    
+    def _bus_send(self, msg):
+        """Send one prebuilt frame, serialized with every other sending thread"""
+        with self._send_lock:
+            self.bus.send(msg)
+    
+    def send_frame(self, tx_id: int, data: bytes):
+        """Send a single CAN frame"""
+        self._bus_send(can.Message(arbitration_id=tx_id, data=data.ljust(8, b'\x00'), is_extended_id=False))
+    
+    def send_single_frame(self, tx_id: int, payload: bytes):
+        """Send an ISO-TP single frame request, dropping replies to earlier requests"""
+        self._clear_rx()
+        super().send_single_frame(tx_id, payload)
+    
+    def _clear_rx(self):
+        """Drop stale Flow Control and responses left over from earlier requests"""
+        for q in (self._fc_q, self._resp_q):
+            while True:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+    
+    def send_multiframe(self, tx_id: int, payload: bytes, timeout: float = 2.0) -> bool:
+        """Send ISO-TP multi-frame message as one prebuilt burst of frames"""
+        return self._send_frames(self._build_frames(tx_id, payload), timeout)
+    
+    def _send_frames(self, frames: list, timeout: float = 2.0) -> bool:
+        """Send a prebuilt First Frame, wait for Flow Control, then burst the CFs"""
+        # Every frame is built before the FF goes out, so after Flow Control
+        # the CFs leave back to back, paced only by STmin
+        send = self._bus_send
+        
+        self._clear_rx()
+        send(frames[0])
+        stmin = self.wait_flow_control(timeout)
+        if stmin is None:
+            return False
+        gap = (stmin if stmin > 0 else 1) / 1000.0
+        
+        last = len(frames) - 1
+        for i in range(1, len(frames)):
+            send(frames[i])
+            if i < last:
+                time.sleep(gap)
+        
+        return True
+    
+    def _start_keepalive(self):
+        self._keepalive_stop.clear()
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+        self._keepalive_thread.start()
+    
+    def _stop_keepalive(self):
+        if self._keepalive_thread:
+            self._keepalive_stop.set()
+            self._keepalive_thread.join()
+            self._keepalive_thread = None
+    
+    def _keepalive_loop(self):
+        """Keep-alive thread: TesterPresent every KEEPALIVE_INTERVAL, between blocks"""
+        while not self._keepalive_stop.wait(KEEPALIVE_INTERVAL):
+            with self._bus_lock:
+                self.tester_present()
+    
+    def wait_flow_control(self, timeout: float = 2.0) -> Optional[int]:
+        """Wait for the ECU's Flow Control frame, returns its STmin byte"""
+        if self._rx_error is not None:
+            return None
+        try:
+            return self._fc_q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def recv_response(self, timeout: float = 2.0) -> Optional[bytes]:
+        """Receive the next complete ECU response"""
+        if self._rx_error is not None:
+            return None
+        try:
+            return self._resp_q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def recv_multiframe(self, timeout: float = 5.0) -> Optional[bytes]:
+        """Receive the next complete ECU response (reassembled by the dispatcher)"""
+        return self.recv_response(timeout)
+    
+    def drain_bus(self, timeout: float = 0.3):
+        """Drop responses and Flow Control frames that arrive within timeout"""
+        time.sleep(timeout)
+        self._clear_rx()
+    
     def request_download_write(self, address: int, length: int) -> tuple:
         """
         Request Download for writing data TO the ECU
@@ -78,14 +389,7 @@ class HarleyFlasher(HarleyECU):
         
         elif resp and resp[0] == 0x7F:
             nrc = resp[2] if len(resp) > 2 else 0
-            nrc_names = {
-                0x13: "Incorrect message length",
-                0x22: "Conditions not correct",
-                0x31: "Request out of range",
-                0x33: "Security access denied",
-                0x70: "Upload/download not accepted",
-            }
-            self.log(f"RequestDownload NRC 0x{nrc:02X}: {nrc_names.get(nrc, 'Unknown')}", "fail")
+            self.log(f"RequestDownload NRC 0x{nrc:02X}: {NRC_NAMES.get(nrc, 'Unknown')}", "fail")
         else:
             self.log(f"No response to RequestDownload", "fail")
         
@@ -102,23 +406,47 @@ class HarleyFlasher(HarleyECU):
         Returns:
             True if ECU accepted
         """
-        # Build message: 36 [seq] [data...]
-        msg = bytes([0x36, block_seq & 0xFF]) + data
-        
+        # Build message in place: 36 [seq] [data...]
+        size = 2 + len(data)
+        if size > TRANSFER_MSG_LEN:
+            return self._send_transfer_block(block_seq, bytes([0x36, block_seq & 0xFF]) + data)
+        
+        self._tx_buf[0] = 0x36
+        self._tx_buf[1] = block_seq & 0xFF
+        self._tx_mv[2:size] = data
+        return self._send_transfer_block(block_seq, self._tx_mv[:size])
+    
+    def _send_transfer_block(self, block_seq: int, msg) -> bool:
+        """Send a complete TransferData message (36 [seq] [data...]) and check the reply"""
         # Send as multi-frame (258 bytes total)
-        if not self.send_multiframe(TX_PHYSICAL, msg):
-            self.log(f"TransferData block {block_seq}: Send failed", "fail")
-            return False
+        if len(msg) == TRANSFER_MSG_LEN:
+            frames = self._build_transfer_frames(msg)
+        else:
+            frames = self._build_frames(TX_PHYSICAL, msg)
         
-        # Wait for response
-        resp = self.recv_response(timeout=2.0)
+        # Hold the bus for the whole exchange so TesterPresent can't split it
+        with self._bus_lock:
+            if not self._send_frames(frames):
+                self.log(f"TransferData block {block_seq}: Send failed", "fail")
+                return False
+            
+            # Wait for response, then P2* while the ECU reports responsePending
+            resp = self.recv_response(timeout=TRANSFER_TIMEOUT)
+            while resp:
+                if resp[0] == 0x7F and len(resp) > 2 and resp[2] == 0x78:
+                    resp = self.recv_response(timeout=P2_STAR_TIMEOUT)
+                elif resp[0] == 0x76 and len(resp) > 1 and resp[1] != block_seq & 0xFF:
+                    # Late reply to an earlier block that timed out - keep waiting
+                    resp = self.recv_response(timeout=TRANSFER_TIMEOUT)
+                else:
+                    break
         
         if resp and resp[0] == 0x76:  # Positive response
             return True
         
         elif resp and resp[0] == 0x7F:
             nrc = resp[2] if len(resp) > 2 else 0
-            self.log(f"TransferData block {block_seq} NRC 0x{nrc:02X}", "fail")
+            self.log(f"TransferData block {block_seq} NRC 0x{nrc:02X}: {NRC_NAMES.get(nrc, 'Unknown')}", "fail")
         else:
             self.log(f"No response to TransferData block {block_seq}", "fail")
         
@@ -134,7 +462,7 @@ class HarleyFlasher(HarleyECU):
             return True
         elif resp and resp[0] == 0x7F:
             nrc = resp[2] if len(resp) > 2 else 0
-            self.log(f"TransferExit NRC 0x{nrc:02X}", "fail")
+            self.log(f"TransferExit NRC 0x{nrc:02X}: {NRC_NAMES.get(nrc, 'Unknown')}", "fail")
         return False
     
     def ecu_reset(self, reset_type: int = 0x01) -> bool:
@@ -164,12 +492,7 @@ class HarleyFlasher(HarleyECU):
         """
         self.log("Clearing DTCs...", "info")
         # Send as broadcast (0x7DF)
-        msg = can.Message(
-            arbitration_id=TX_FUNCTIONAL,
-            data=bytes([0x04, 0x14, 0xFF, 0xFF, 0xFF, 0x00, 0x00, 0x00]),
-            is_extended_id=False
-        )
-        self.bus.send(msg)
+        self.send_single_frame(TX_FUNCTIONAL, bytes([0x14, 0xFF, 0xFF, 0xFF]))
         
         # Wait for response
         resp = self.recv_response(timeout=1.0)
@@ -201,37 +524,62 @@ class HarleyFlasher(HarleyECU):
         block_size = min(BLOCK_SIZE, max_block - 2)  # -2 for service+seq overhead
         
         # Step 2: Transfer Data
+        # Stamp every 36 [seq] header up front so the loop only slices; the
+        # zero-filled buffer already pads the last block
+        msg_size = block_size + 2
+        nblocks = (total_len + block_size - 1) // block_size
+        src = memoryview(data)
+        messages = bytearray(nblocks * msg_size)
+        for i in range(nblocks):
+            pos = i * msg_size
+            chunk = src[i * block_size:(i + 1) * block_size]
+            messages[pos] = 0x36
+            messages[pos + 1] = (i % 255) + 1  # Wrap 255 -> 1
+            messages[pos + 2:pos + 2 + len(chunk)] = chunk
+        messages = memoryview(messages)
+        
+        # Progress percentage after each block, computed once
+        pct_table = [min(100, (i + 1) * block_size * 100 // total_len) for i in range(nblocks)]
+        
         offset = 0
-        block_seq = 1
+        block = 0
         retries = 0
         
-        while offset < total_len:
-            # Get chunk (pad last block if needed)
-            chunk = data[offset:offset + block_size]
-            if len(chunk) < block_size:
-                chunk = chunk + bytes(block_size - len(chunk))
-            
-            # Send block
-            if self.transfer_data_write(block_seq, chunk):
-                offset += block_size
-                block_seq = (block_seq % 255) + 1  # Wrap 255 -> 1
-                retries = 0
-                
-                # Progress
-                pct = min(100, offset * 100 // total_len)
-                print(f"\r    Flashing: {pct:3d}% ({offset}/{total_len} bytes)", end='', flush=True)
-            else:
-                retries += 1
-                if retries >= MAX_RETRIES:
+        # TesterPresent runs on a timer thread; it takes the bus lock between blocks
+        self._start_keepalive()
+        previous_sched = set_realtime_scheduling() if self.realtime else None
+        try:
+            while block < nblocks:
+                if self._rx_error is not None:
                     print()
-                    self.log(f"Too many retries at block {block_seq}", "fail")
+                    self.log(f"Receive path failed ({self._rx_error}), stopping flash", "fail")
                     return False
-                time.sleep(0.1)
-                continue
-            
-            # Keep-alive every 4KB
-            if offset % 4096 == 0 and offset > 0:
-                self.tester_present()
+                
+                block_seq = messages[block * msg_size + 1]
+                
+                # Send block
+                if self._send_transfer_block(block_seq, messages[block * msg_size:(block + 1) * msg_size]):
+                    block += 1
+                    offset += block_size
+                    retries = 0
+                    
+                    # Progress (rate-limited - each flush is a console write)
+                    now = time.monotonic()
+                    if now - self._last_print > PROGRESS_INTERVAL or block == nblocks:
+                        self._last_print = now
+                        pct = pct_table[block - 1]
+                        print(f"\r    Flashing: {pct:3d}% ({offset}/{total_len} bytes)", end='', flush=True)
+                else:
+                    retries += 1
+                    if retries >= MAX_RETRIES:
+                        print()
+                        self.log(f"Too many retries at block {block_seq}", "fail")
+                        return False
+                    time.sleep(RETRY_BACKOFF * (1 << (retries - 1)))  # 10ms, 20ms, ...
+                    continue
+        finally:
+            restore_scheduling(previous_sched)
+            self._stop_keepalive()
         
         print()  # Newline after progress
         
@@ -253,22 +601,34 @@ class HarleyFlasher(HarleyECU):
             True if successful
         """
         # Load tune file
-        if not os.path.exists(tune_file):
+        try:
+            f = open(tune_file, 'rb')
+        except FileNotFoundError:
             self.log(f"File not found: {tune_file}", "fail")
             return False
         
-        with open(tune_file, 'rb') as f:
-            tune_data = f.read()
+        # Read the tune on a worker thread while authentication runs on the bus
+        with f, ThreadPoolExecutor(max_workers=1) as pool:
+            pending_read = pool.submit(f.read)
+            
+            # Authenticate first
+            auth_ok = self.authenticate()
+            tune_data = pending_read.result()
         
         self.log(f"Tune file: {tune_file} ({len(tune_data)} bytes)", "info")
         
-        # Authenticate first
-        if not self.authenticate():
+        if not auth_ok:
             self.log("Authentication failed", "fail")
             return False
         
-        # Flash the data
-        if not self.flash_data(WRITE_ADDRESS, tune_data):
+        # Flash the data - no GC pauses while blocks are in flight
+        gc.disable()
+        try:
+            flashed = self.flash_data(WRITE_ADDRESS, tune_data)
+        finally:
+            gc.collect()
+            gc.enable()
+        if not flashed:
             return False
         
         # Reset ECU to apply (as seen in capture)
@@ -281,6 +641,33 @@ class HarleyFlasher(HarleyECU):
         return True
 
 
+def set_realtime_scheduling():
+    """
+    Request SCHED_FIFO for the calling thread for steadier block timing
+    
+    Linux only; without the privilege (or on other platforms) this is a no-op.
+    Only the calling thread changes, and threads it starts afterwards would
+    inherit the policy, so call it once the dispatcher and keep-alive run.
+    Returns the previous (policy, param) for restore_scheduling, or None.
+    """
+    try:
+        previous = (os.sched_getscheduler(0), os.sched_getparam(0))
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(50))
+        return previous
+    except (OSError, AttributeError):
+        return None
+
+
+def restore_scheduling(previous):
+    """Put the calling thread back on the policy set_realtime_scheduling replaced"""
+    if previous is None:
+        return
+    try:
+        os.sched_setscheduler(0, *previous)
+    except OSError:
+        pass
+
+
 def main():
     print("=" * 70)
     print("Harley ECU Flash Tool")
@@ -296,21 +683,26 @@ def main():
     print("╚══════════════════════════════════════════════════════════════════╝")
     print()
     
-    if len(sys.argv) < 2:
-        print("Usage: python ecu_flash.py <tune_file.bin>")
+    args = [a for a in sys.argv[1:] if a != '--realtime']
+    realtime = len(args) < len(sys.argv) - 1
+    
+    if not args:
+        print("Usage: python ecu_flash.py [--realtime] <tune_file.bin>")
         print()
         print("Example: python ecu_flash.py my_tune.bin")
         print()
         print("The tune file should be a raw binary dump (not .pvt format)")
+        print("--realtime runs the block loop at SCHED_FIFO (Linux, needs privilege)")
         return 1
     
-    tune_file = sys.argv[1]
+    tune_file = args[0]
     
-    if not os.path.exists(tune_file):
+    try:
+        file_size = os.stat(tune_file).st_size
+    except FileNotFoundError:
         print(f"[-] File not found: {tune_file}")
         return 1
     
-    file_size = os.path.getsize(tune_file)
     print(f"[*] Tune file: {tune_file}")
     print(f"[*] File size: {file_size:,} bytes")
     print()
@@ -342,11 +734,13 @@ def main():
     
     # Load auth payload
     flasher = HarleyFlasher()
+    flasher.realtime = realtime
     
     # Find capture file (any capture that contains auth payload)
-    captures = sorted([f for f in os.listdir('.') 
-                      if (f.startswith('capture_') or f.startswith('raw_capture_') or f.startswith('write_capture_')) 
-                      and f.endswith('.txt')])
+    with os.scandir('.') as it:
+        captures = sorted(e.name for e in it
+                          if e.name.startswith(('capture_', 'raw_capture_', 'write_capture_'))
+                          and e.name.endswith('.txt'))
     if not captures:
         print("[-] No capture file found for auth payload")
         print("    Run: python harley_ecu_dump.py capture")
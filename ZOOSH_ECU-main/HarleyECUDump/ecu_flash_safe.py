@@ -11,16 +11,32 @@ Enhanced safety features for ECU flashing:
 """
 
 import os
+import re
 import sys
+import mmap
 import time
 import hashlib
+import threading
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
 
 # Constants
 TUNE_OFFSET = 0x1C000
 TUNE_SIZE = 0x4000  # 16KB
 WRITE_ADDRESS = 0x00004000
+CAL_ADDRESS = 0x7D8000  # Calibration base as seen by RequestUpload
+UPLOAD_WINDOW = 0xFF0  # Largest upload answer that fits one ISO-TP message
+S3_TIMEOUT = 5.0  # ECU drops the unlocked session after this long without traffic
+S3_MARGIN = 1.0  # Treat the session as lapsed this much earlier
+KEEPALIVE_INTERVAL = 2.0  # Seconds between TesterPresent while a flash is running
+
+# Zero padding for a short CAN frame, indexed by pad length
+_PADS = tuple(bytes(n) for n in range(8))
+# Consecutive Frame PCI byte, indexed by sequence number
+_CF_HDRS = tuple(0x20 | seq for seq in range(16))
+
+# 0x7E0 frames in a capture log: "0x7E0  8  <16 hex digits>"
+_CAPTURE_TX_RE = re.compile(rb'0x7E0\s+8\s+([0-9A-Fa-f]{16})')
 
 try:
     import can
@@ -28,6 +44,12 @@ try:
 except ImportError:
     CAN_AVAILABLE = False
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 
 class SafeFlashError(Exception):
     """Custom exception for flash errors"""
@@ -56,6 +78,40 @@ class SafeECUFlasher:
         self.auth_payload = None
         self.backup_data = None
         self.backup_file = None
+        # Scratch CAN frame, filled in place for every frame we send.
+        # python-can keeps a bytearray by reference rather than copying it,
+        # so a Message built from this must be sent before the next write
+        self._tx_buf = bytearray(8)
+        # ISO-TP reassembly buffer: largest response plus one CF of overrun
+        self._rx_buf = bytearray(4096 + 7)
+        # TransferData message scratch: SID, block sequence, 256 data bytes
+        self._block_buf = bytearray(2 + 256)
+        self._block_buf[0] = 0x36
+        # File checksums keyed by (path, mtime_ns, size)
+        self._file_sha_cache = {}
+        # Time until which the current unlocked session can be reused
+        self._authed_until = 0.0
+        # Keeps keep-alive frames out of the middle of a multi-frame send
+        self._bus_lock = threading.RLock()
+        self._keepalive_stop = threading.Event()
+        self._keepalive_thread: Optional[threading.Thread] = None
+        # Constant frames, built once and resent as-is
+        if CAN_AVAILABLE:
+            self._msg_tp = can.Message(arbitration_id=0x7E0,
+                                       data=bytes([0x02, 0x3E, 0x00, 0, 0, 0, 0, 0]),
+                                       is_extended_id=False)
+            self._msg_keepalive = can.Message(arbitration_id=0x7E0,
+                                              data=bytes([0x02, 0x3E, 0x80, 0, 0, 0, 0, 0]),
+                                              is_extended_id=False)
+            self._msg_fc = can.Message(arbitration_id=0x7E0,
+                                       data=bytes([0x30, 0, 0, 0, 0, 0, 0, 0]),
+                                       is_extended_id=False)
+            self._msg_ext_session = can.Message(arbitration_id=0x7DF,
+                                                data=bytes([0x02, 0x10, 0x03, 0, 0, 0, 0, 0]),
+                                                is_extended_id=False)
+            self._msg_clear_dtc = can.Message(arbitration_id=0x7DF,
+                                              data=bytes([0x04, 0x14, 0xFF, 0xFF, 0xFF, 0, 0, 0]),
+                                              is_extended_id=False)
     
     # ==================== Connection ====================
     
@@ -68,6 +124,8 @@ class SafeECUFlasher:
                     channel='PCAN_USBBUS1', 
                     bitrate=500000
                 )
+                # Only the ECU's responses are of interest, let the driver drop the rest
+                self.bus.set_filters([{"can_id": 0x7E8, "can_mask": 0x7FF, "extended": False}])
                 self.log("✓ PCAN connected", 'success')
                 return True
             except Exception as e:
@@ -84,6 +142,7 @@ class SafeECUFlasher:
             except:
                 pass
             self.bus = None
+        self._authed_until = 0.0
     
     def is_connected(self) -> bool:
         return self.bus is not None
@@ -93,9 +152,26 @@ class SafeECUFlasher:
     def send_frame(self, arb_id: int, data: bytes) -> bool:
         """Send single CAN frame with error handling"""
         try:
-            frame = bytes([len(data)]) + data + bytes(7 - len(data))
-            msg = can.Message(arbitration_id=arb_id, data=frame, is_extended_id=False)
-            self.bus.send(msg)
+            n = len(data)
+            if n > 7:
+                raise ValueError(f"{n} bytes is too long for a single frame")
+            with self._bus_lock:
+                buf = self._tx_buf
+                buf[0] = n
+                buf[1:1 + n] = data
+                buf[1 + n:] = _PADS[7 - n]
+                msg = can.Message(arbitration_id=arb_id, data=buf, is_extended_id=False)
+                self.bus.send(msg)
+            return True
+        except Exception as e:
+            self.log(f"Send error: {e}", 'error')
+            return False
+    
+    def send_message(self, msg) -> bool:
+        """Send a prebuilt CAN frame with error handling"""
+        try:
+            with self._bus_lock:
+                self.bus.send(msg)
             return True
         except Exception as e:
             self.log(f"Send error: {e}", 'error')
@@ -103,6 +179,10 @@ class SafeECUFlasher:
     
     def send_multiframe(self, arb_id: int, data: bytes) -> bool:
         """Send multi-frame ISO-TP message with error handling"""
+        with self._bus_lock:
+            return self._send_multiframe(arb_id, data)
+    
+    def _send_multiframe(self, arb_id: int, data: bytes) -> bool:
         try:
             if len(data) <= 7:
                 return self.send_frame(arb_id, data)
@@ -113,25 +193,50 @@ class SafeECUFlasher:
             msg = can.Message(arbitration_id=arb_id, data=ff, is_extended_id=False)
             self.bus.send(msg)
             
-            # Wait for Flow Control
-            fc = self.bus.recv(timeout=2.0)
-            if not fc or fc.arbitration_id != 0x7E8 or (fc.data[0] & 0xF0) != 0x30:
-                self.log("No Flow Control received", 'error')
-                return False
-            
-            # Consecutive Frames
-            remaining = data[6:]
+            # Build every Consecutive Frame while the ECU prepares Flow Control.
+            # Each is its own bytes copy: python-can keeps a bytearray by
+            # reference, so queued frames can't share the scratch buffer
+            buf = self._tx_buf
+            Message = can.Message
+            frames = []
+            append = frames.append
+            view = memoryview(data)
             seq = 1
-            while remaining:
-                chunk = remaining[:7]
-                remaining = remaining[7:]
-                cf = bytes([0x20 | (seq & 0x0F)]) + chunk
-                if len(cf) < 8:
-                    cf = cf + bytes(8 - len(cf))
-                msg = can.Message(arbitration_id=arb_id, data=cf, is_extended_id=False)
-                self.bus.send(msg)
+            for pos in range(6, length, 7):
+                chunk = view[pos:pos + 7]
+                n = len(chunk)
+                buf[0] = _CF_HDRS[seq]
+                buf[1:1 + n] = chunk
+                buf[1 + n:] = _PADS[7 - n]
+                append(Message(arbitration_id=arb_id, data=bytes(buf), is_extended_id=False))
                 seq = (seq + 1) & 0x0F
-                time.sleep(0.001)
+            
+            # Wait for Flow Control
+            fc = self._recv_flow_control()
+            if fc is None:
+                return False
+            block_size, stmin = fc
+            
+            # Consecutive Frames - back to back unless the ECU asked for STmin,
+            # pausing for a fresh Flow Control after every block_size frames
+            send = self.bus.send
+            last = len(frames)
+            for i, msg in enumerate(frames, 1):
+                send(msg)
+                if i == last:
+                    break
+                if block_size and i % block_size == 0:
+                    fc = self._recv_flow_control()
+                    if fc is None:
+                        return False
+                    block_size, stmin = fc
+                elif stmin >= 0.001:
+                    time.sleep(stmin)
+                elif stmin:
+                    # sleep() can't resolve sub-millisecond gaps, spin instead
+                    until = time.perf_counter() + stmin
+                    while time.perf_counter() < until:
+                        pass
             
             return True
             
@@ -139,39 +244,66 @@ class SafeECUFlasher:
             self.log(f"Multi-frame send error: {e}", 'error')
             return False
     
+    def _recv_flow_control(self, timeout: float = 2.0) -> Optional[Tuple[int, float]]:
+        """Wait for the ECU's Flow Control, returns (block_size, STmin seconds)"""
+        fc = self.bus.recv(timeout=timeout)
+        if not fc or fc.arbitration_id != 0x7E8 or (fc.data[0] & 0xF0) != 0x30:
+            self.log("No Flow Control received", 'error')
+            return None
+        # STmin per ISO 15765-2: 0x00-0x7F ms, 0xF1-0xF9 100-900us,
+        # reserved values mean the longest separation (127ms)
+        stmin = fc.data[2]
+        if stmin <= 0x7F:
+            gap = stmin / 1000.0
+        elif 0xF1 <= stmin <= 0xF9:
+            gap = (stmin - 0xF0) / 10000.0
+        else:
+            gap = 0.127
+        return (fc.data[1], gap)
+    
     def recv_response(self, timeout: float = 2.0) -> Optional[bytes]:
         """Receive ISO-TP response with proper assembly"""
         try:
-            start = time.time()
-            data = bytearray()
+            # Per-frame work is kept to local lookups
+            recv = self.bus.recv
+            clock = time.time
+            deadline = clock() + timeout
+            buf = self._rx_buf
+            pos = 0
             expected = 0
             
-            while time.time() - start < timeout:
-                msg = self.bus.recv(timeout=0.1)
-                if not msg or msg.arbitration_id != 0x7E8:
-                    continue
+            while True:
+                # Block once on whatever is left of the deadline
+                remaining = deadline - clock()
+                if remaining <= 0:
+                    break
+                msg = recv(timeout=remaining)
+                if not msg:
+                    break
                 
-                pci = msg.data[0]
+                frame = msg.data
+                pci = frame[0]
                 frame_type = pci >> 4
                 
                 if frame_type == 0:  # Single Frame
-                    return bytes(msg.data[1:1+(pci & 0x0F)])
+                    if frame[1] == 0x7E:
+                        continue  # TesterPresent reply, never what we wait for
+                    return bytes(frame[1:1+(pci & 0x0F)])
                 
                 elif frame_type == 1:  # First Frame
-                    expected = ((pci & 0x0F) << 8) | msg.data[1]
-                    data.extend(msg.data[2:8])
+                    expected = ((pci & 0x0F) << 8) | frame[1]
+                    buf[0:6] = frame[2:8]
+                    pos = 6
                     # Send Flow Control
-                    fc = can.Message(arbitration_id=0x7E0,
-                                   data=bytes([0x30, 0, 0, 0, 0, 0, 0, 0]),
-                                   is_extended_id=False)
-                    self.bus.send(fc)
+                    self.bus.send(self._msg_fc)
                 
                 elif frame_type == 2:  # Consecutive Frame
-                    data.extend(msg.data[1:8])
-                    if len(data) >= expected:
-                        return bytes(data[:expected])
+                    buf[pos:pos + 7] = frame[1:8]
+                    pos += 7
+                    if pos >= expected:
+                        return bytes(buf[:expected])
             
-            return bytes(data) if data else None
+            return bytes(buf[:pos]) if pos else None
             
         except Exception as e:
             self.log(f"Receive error: {e}", 'error')
@@ -186,30 +318,37 @@ class SafeECUFlasher:
             return False
         
         try:
-            import re
-            with open(capture_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            matches = re.findall(r'0x7E0\s+8\s+([0-9A-Fa-f]{16})', content)
-            
-            payload = bytearray()
+            # Scan the mapped capture as bytes and stop as soon as the
+            # payload is complete
+            buf = bytearray(2048)
+            pos = 0
             collecting = False
             
-            for match in matches:
-                frame = bytes.fromhex(match)
-                pci = frame[0]
-                
-                if (pci & 0xF0) == 0x10:
-                    total_len = ((pci & 0x0F) << 8) | frame[1]
-                    if frame[2] == 0x36:
-                        payload = bytearray(frame[4:8])
-                        collecting = True
-                        continue
-                
-                if collecting and (pci & 0xF0) == 0x20:
-                    payload.extend(frame[1:8])
-                    if len(payload) >= 2006:
-                        break
+            with open(capture_file, 'rb') as f:
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # Empty files can't be mapped
+                    mm = None
+                if mm is not None:
+                    with mm:
+                        for match in _CAPTURE_TX_RE.finditer(mm):
+                            frame = bytes.fromhex(match.group(1).decode('ascii'))
+                            pci = frame[0]
+                            
+                            if (pci & 0xF0) == 0x10:
+                                if frame[2] == 0x36:
+                                    buf[0:4] = frame[4:8]
+                                    pos = 4
+                                    collecting = True
+                                    continue
+                            
+                            if collecting and (pci & 0xF0) == 0x20:
+                                buf[pos:pos + 7] = frame[1:8]
+                                pos += 7
+                                if pos >= 2006:
+                                    break
+            
+            payload = buf[:pos]
             
             if len(payload) >= 2000:
                 self.auth_payload = bytes(payload)
@@ -223,10 +362,16 @@ class SafeECUFlasher:
             self.log(f"✗ Auth load error: {e}", 'error')
             return False
     
-    def authenticate(self) -> bool:
-        """Perform authentication sequence with retry"""
+    def authenticate(self, force: bool = False) -> bool:
+        """Perform authentication sequence with retry, reusing a live session"""
+        if not force and time.time() < self._authed_until:
+            self.tester_present()
+            return True
+        
+        self._authed_until = 0.0
         for attempt in range(self.MAX_RETRIES):
             if self._do_authenticate():
+                self._authed_until = time.time() + S3_TIMEOUT - S3_MARGIN
                 return True
             self.log(f"Auth attempt {attempt+1} failed, retrying...", 'warning')
             time.sleep(self.RETRY_DELAY)
@@ -238,18 +383,26 @@ class SafeECUFlasher:
         """Internal authentication implementation"""
         try:
             # TesterPresent
-            self.send_frame(0x7E0, bytes([0x3E, 0x00]))
-            time.sleep(0.05)
+            self.send_message(self._msg_tp)
             
             # Extended Session (broadcast)
-            msg = can.Message(arbitration_id=0x7DF,
-                            data=bytes([0x02, 0x10, 0x03, 0, 0, 0, 0, 0]),
-                            is_extended_id=False)
-            self.bus.send(msg)
-            time.sleep(0.1)
+            self.bus.send(self._msg_ext_session)
+            
+            # Wait for the session change to be acknowledged rather than a
+            # fixed delay; the TesterPresent reply always comes before it
+            deadline = time.time() + 0.15
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                msg = self.bus.recv(timeout=remaining)
+                if msg is None:
+                    break
+                if msg.arbitration_id == 0x7E8 and msg.data[1] == 0x50:
+                    break
             
-            # Drain any pending responses
-            while self.bus.recv(timeout=0.05):
+            # Drain any pending responses without blocking
+            while self.bus.recv(timeout=0) is not None:
                 pass
             
             # Security Access - Request Seed
@@ -299,27 +452,48 @@ class SafeECUFlasher:
     
     # ==================== Memory Operations ====================
     
-    def read_memory(self, address: int, length: int, format_byte: int = 0xB0) -> Optional[bytes]:
-        """Read memory with progress and re-auth"""
+    def read_memory(self, address: int, length: int, format_byte: int = 0xB0,
+                    on_chunk: Optional[Callable[[int, bytes], bool]] = None) -> Optional[bytes]:
+        """
+        Read memory with progress and re-auth.
+        
+        on_chunk(offset, chunk) is called with each response's data; returning
+        False stops the read early and returns what has been read so far.
+        """
         data = bytearray()
         current_addr = address
         read_count = 0
+        # Ask for a whole window per request until the ECU shows it only
+        # hands back its fixed-size chunks, then use the short request
+        bulk = True
         
         while len(data) < length:
             # Re-authenticate every 32 reads
             if read_count > 0 and read_count % 32 == 0:
                 self.log("  Re-authenticating...", 'info')
-                if not self.authenticate():
+                if not self.authenticate(force=True):
                     return None
             
             # RequestUpload with retry
             success = False
             for attempt in range(self.MAX_RETRIES):
                 req = bytes([0x35, format_byte, 0x01]) + current_addr.to_bytes(4, 'big')
-                self.send_frame(0x7E0, req)
-                resp = self.recv_response(timeout=3.0)
+                resp = None
+                if bulk:
+                    want = min(UPLOAD_WINDOW, length - len(data))
+                    if self.send_multiframe(0x7E0, req + want.to_bytes(4, 'big')):
+                        resp = self.recv_response(timeout=3.0)
+                    if not resp or resp[0] != 0x75:
+                        bulk = False
+                        resp = None
+                    elif len(resp) - 1 < want:
+                        bulk = False
+                if not resp:
+                    self.send_frame(0x7E0, req)
+                    resp = self.recv_response(timeout=3.0)
                 
                 if resp and resp[0] == 0x75:
+                    offset = len(data)
                     data.extend(resp[1:])
                     current_addr += len(resp) - 1
                     success = True
@@ -331,6 +505,9 @@ class SafeECUFlasher:
                 self.log(f"✗ Read failed at 0x{current_addr:X}", 'error')
                 return None
             
+            if on_chunk is not None and on_chunk(offset, bytes(data[offset:length])) is False:
+                return bytes(data[:length])
+            
             read_count += 1
             self.progress(len(data) / length * 100)
         
@@ -350,24 +527,32 @@ class SafeECUFlasher:
             return False
         
         resp = self.recv_response()
+        if (not resp or resp[0] != 0x74) and self._authed_until:
+            # A reused session may have lapsed, unlock it again and retry once
+            self.log("  RequestDownload rejected, re-authenticating...", 'warning')
+            if self.authenticate(force=True) and self.send_multiframe(0x7E0, req):
+                resp = self.recv_response()
         if not resp or resp[0] != 0x74:
             self.log("✗ RequestDownload rejected", 'error')
             return False
         
-        # TransferData in 256-byte blocks
+        # TransferData in 256-byte blocks, built in place in the scratch message
         block_size = 256
         offset = 0
         block_seq = 1
+        msg = self._block_buf
+        view = memoryview(data)
         
         while offset < total_len:
-            chunk = data[offset:offset + block_size]
-            if len(chunk) < block_size:
-                chunk = chunk + bytes(block_size - len(chunk))
+            n = min(block_size, total_len - offset)
+            msg[1] = block_seq
+            msg[2:2 + n] = view[offset:offset + n]
+            if n < block_size:
+                msg[2 + n:] = bytes(block_size - n)
             
             # Send with retry
             success = False
             for attempt in range(self.MAX_RETRIES):
-                msg = bytes([0x36, block_seq]) + chunk
                 if not self.send_multiframe(0x7E0, msg):
                     time.sleep(self.RETRY_DELAY)
                     continue
@@ -390,17 +575,36 @@ class SafeECUFlasher:
         
         return True
     
+    def tester_present(self):
+        """Keep the session open without a response, refreshing the auth deadline"""
+        if self.send_message(self._msg_keepalive) and self._authed_until:
+            self._authed_until = time.time() + S3_TIMEOUT - S3_MARGIN
+    
+    def _start_keepalive(self):
+        self._keepalive_stop.clear()
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+        self._keepalive_thread.start()
+    
+    def _stop_keepalive(self):
+        if self._keepalive_thread:
+            self._keepalive_stop.set()
+            self._keepalive_thread.join()
+            self._keepalive_thread = None
+    
+    def _keepalive_loop(self):
+        """Keep-alive thread: TesterPresent every KEEPALIVE_INTERVAL"""
+        while not self._keepalive_stop.wait(KEEPALIVE_INTERVAL):
+            self.tester_present()
+    
     def ecu_reset(self):
         """Reset ECU"""
+        self._authed_until = 0.0
         self.send_frame(0x7E0, bytes([0x11, 0x01]))
         time.sleep(1.0)
     
     def clear_dtc(self):
         """Clear DTCs"""
-        msg = can.Message(arbitration_id=0x7DF,
-                        data=bytes([0x04, 0x14, 0xFF, 0xFF, 0xFF, 0, 0, 0]),
-                        is_extended_id=False)
-        self.bus.send(msg)
+        self.bus.send(self._msg_clear_dtc)
         time.sleep(0.5)
     
     # ==================== Safe Flash Operations ====================
@@ -409,6 +613,28 @@ class SafeECUFlasher:
         """Calculate SHA256 checksum"""
         return hashlib.sha256(data).hexdigest()[:16]
     
+    def calculate_checksum_file(self, path: str) -> str:
+        """Calculate SHA256 checksum of a file, cached until it changes"""
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        checksum = self._file_sha_cache.get(key)
+        if checksum is None:
+            with open(path, 'rb') as f:
+                if hasattr(hashlib, 'file_digest'):
+                    digest = hashlib.file_digest(f, 'sha256')
+                else:
+                    digest = hashlib.sha256()
+                    for chunk in iter(lambda: f.read(65536), b''):
+                        digest.update(chunk)
+            checksum = digest.hexdigest()[:16]
+            self._file_sha_cache[key] = checksum
+        return checksum
+    
+    def _cache_file_checksum(self, path: str, checksum: str):
+        """Record the checksum of a file we just wrote ourselves"""
+        st = os.stat(path)
+        self._file_sha_cache[(os.path.abspath(path), st.st_mtime_ns, st.st_size)] = checksum
+    
     def preflight_check(self, tune_file: str, capture_file: str) -> Tuple[bool, str]:
         """
         Pre-flight checks before flashing.
@@ -452,17 +678,14 @@ class SafeECUFlasher:
         if not self.authenticate():
             return False
         
-        # Read current calibration
+        # Read only the tune region of the current calibration
         self.log("  Reading current calibration...", 'info')
-        cal_data = self.read_memory(0x7D8000, 0x28000, 0xB0)
+        current_tune = self.read_tune()
         
-        if not cal_data or len(cal_data) < TUNE_OFFSET + TUNE_SIZE:
+        if not current_tune:
             self.log("✗ Failed to read current calibration", 'error')
             return False
         
-        # Extract tune region
-        current_tune = cal_data[TUNE_OFFSET:TUNE_OFFSET + TUNE_SIZE]
-        
         # Save backup
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.backup_file = f"backup_pre_flash_{timestamp}.bin"
@@ -472,12 +695,20 @@ class SafeECUFlasher:
         
         self.backup_data = current_tune
         checksum = self.calculate_checksum(current_tune)
+        self._cache_file_checksum(self.backup_file, checksum)
         
         self.log(f"✓ Backup saved: {self.backup_file}", 'success')
         self.log(f"  Checksum: {checksum}", 'info')
         
         return True
     
+    def read_tune(self) -> Optional[bytes]:
+        """Read the 16KB tune window, the only region backup and verify need"""
+        data = self.read_memory(CAL_ADDRESS + TUNE_OFFSET, TUNE_SIZE, 0xB0)
+        if not data or len(data) < TUNE_SIZE:
+            return None
+        return data
+    
     def verify_write(self, expected_data: bytes) -> bool:
         """
         Verify written data by reading back and comparing.
@@ -490,24 +721,43 @@ class SafeECUFlasher:
         if not self.authenticate():
             return False
         
-        # Read back the tune region
+        # Read back the tune region, comparing each response as it arrives
+        # so a bad write is reported without waiting for the whole read
+        def matches(offset: int, chunk: bytes) -> bool:
+            return chunk == expected_data[offset:offset + len(chunk)]
+        
         self.log("  Reading back written data...", 'info')
-        cal_data = self.read_memory(0x7D8000, 0x28000, 0xB0)
+        actual_data = self.read_memory(CAL_ADDRESS + TUNE_OFFSET, TUNE_SIZE, 0xB0, on_chunk=matches)
         
-        if not cal_data or len(cal_data) < TUNE_OFFSET + TUNE_SIZE:
+        if not actual_data:
             self.log("✗ Verification read failed", 'error')
             return False
         
-        actual_data = cal_data[TUNE_OFFSET:TUNE_OFFSET + TUNE_SIZE]
-        
         # Compare
         if actual_data == expected_data:
             self.log("✓ Verification PASSED - data matches!", 'success')
             return True
         else:
+            if len(actual_data) < TUNE_SIZE:
+                self.log(f"  Read stopped at first bad block, 0x{len(actual_data):04X} bytes checked", 'info')
+                expected_data = expected_data[:len(actual_data)]
             # Count differences
-            diffs = sum(1 for a, b in zip(actual_data, expected_data) if a != b)
+            if HAS_NUMPY and len(actual_data) == len(expected_data):
+                mismatch = np.frombuffer(actual_data, dtype=np.uint8) != np.frombuffer(expected_data, dtype=np.uint8)
+                diffs = int(np.count_nonzero(mismatch))
+                first = int(np.flatnonzero(mismatch)[0]) if diffs else None
+            else:
+                diffs = 0
+                first = None
+                for i, (a, b) in enumerate(zip(actual_data, expected_data)):
+                    if a != b:
+                        diffs += 1
+                        if first is None:
+                            first = i
             self.log(f"✗ Verification FAILED - {diffs} bytes differ!", 'error')
+            if first is not None:
+                self.log(f"  First mismatch at tune offset 0x{first:04X}: "
+                         f"read 0x{actual_data[first]:02X}, expected 0x{expected_data[first]:02X}", 'error')
             return False
     
     def safe_flash(self, tune_file: str, capture_file: str, verify: bool = True) -> bool:
@@ -538,7 +788,7 @@ class SafeECUFlasher:
         with open(tune_file, 'rb') as f:
             tune_data = f.read()
         
-        tune_checksum = self.calculate_checksum(tune_data)
+        tune_checksum = self.calculate_checksum_file(tune_file)
         self.log(f"  Tune checksum: {tune_checksum}", 'info')
         
         # Load auth payload
@@ -551,6 +801,9 @@ class SafeECUFlasher:
         if not self.connect():
             return False
         
+        # Hold the unlocked session open across backup, write and verify
+        self._start_keepalive()
+        
         try:
             # Create backup
             self.log("\n[4/6] Creating backup...", 'info')
@@ -558,6 +811,12 @@ class SafeECUFlasher:
                 self.log("✗ Backup failed - aborting flash for safety", 'error')
                 return False
             
+            # The backup read is the ECU's current tune; nothing to do if it
+            # already matches, and it is as good as a verify read
+            if self.backup_data == tune_data:
+                self.log("✓ ECU already holds this tune - skipping write", 'success')
+                return True
+            
             # Re-authenticate for write
             self.log("\n[5/6] Flashing tune...", 'info')
             if not self.authenticate():
@@ -603,6 +862,7 @@ class SafeECUFlasher:
             return False
             
         finally:
+            self._stop_keepalive()
             self.disconnect()
     
     def restore_backup(self, backup_file: str, capture_file: str) -> bool:
@@ -13,19 +13,51 @@ Maximum reliability features:
 """
 
 import os
+import re
 import sys
+import mmap
 import time
 import hashlib
+import hmac
 import json
+import math
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Tuple, List, Dict
+from typing import Callable, Optional, Tuple, List, Dict
+
+# CAN settings; on Linux, interface 'socketcan' with channel 'can0' uses a
+# raw CAN socket and set_filters installs the 0x7E8 filter in the kernel
+CAN_INTERFACE = 'pcan'
+CAN_CHANNEL = 'PCAN_USBBUS1'
+CAN_BITRATE = 500000
 
 # Constants
 TUNE_OFFSET = 0x1C000
 TUNE_SIZE = 0x4000  # 16KB
 WRITE_ADDRESS = 0x00004000
 BLOCK_SIZE = 256
+TUNE_WINDOW = (TUNE_OFFSET, TUNE_OFFSET + TUNE_SIZE)  # Tune slice of a calibration read
+
+# Fixed UDS requests (single-frame payloads)
+TESTER_PRESENT = bytes([0x3E, 0x00])
+SEED_REQUEST = bytes([0x27, 0x01])
+AUTH_DOWNLOAD_REQUEST = bytes([0x34, 0x00, 0x44, 0, 0, 0, 0, 0, 0, 0x07, 0xD6])
+ECU_RESET = bytes([0x11, 0x01])
+
+# Fixed raw CAN frames
+FLOW_CTRL = bytes([0x30, 0, 0, 0, 0, 0, 0, 0])
+EXTENDED_SESSION = bytes([0x02, 0x10, 0x03, 0, 0, 0, 0, 0])
+CLEAR_DTC = bytes([0x04, 0x14, 0xFF, 0xFF, 0xFF, 0, 0, 0])
+
+# Zero padding for a short single frame, indexed by pad length
+PADDING = tuple(bytes(n) for n in range(8))
+
+# Consecutive Frame PCI bytes for sequence numbers 1..15, 0
+_CF_PCI_CYCLE = bytes(0x20 | (seq & 0x0F) for seq in range(1, 17))
+
+# 0x7E0 frames in a capture log: "0x7E0  8  <16 hex digits>"
+_CAPTURE_TX_RE = re.compile(rb'0x7E0\s+8\s+([0-9A-Fa-f]{16})')
 
 # Backup locations
 BACKUP_LOCATIONS = [
@@ -40,10 +72,18 @@ try:
 except ImportError:
     CAN_AVAILABLE = False
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 
 class FlashAuditLog:
     """Comprehensive audit logging for flash operations"""
 
+    FLUSH_EVERY = 32  # Entries buffered between flushes (errors flush at once)
+
     def __init__(self, filename: str = None):
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -52,7 +92,12 @@ class FlashAuditLog:
         self.filename = filename
         self.entries = []
         self.start_time = datetime.now()
+        # Entries are stamped relative to start_time, which the header records
+        self._t0 = time.monotonic_ns()
         self._write_header()
+        # One buffered handle for the whole operation, closed by finalize()
+        self._fh = open(self.filename, 'a', buffering=64 * 1024)
+        self._unflushed = 0
 
     def _write_header(self):
         header = (
@@ -68,23 +113,40 @@ class FlashAuditLog:
             f.write(header)
 
     def log(self, level: str, message: str, data: Dict = None):
-        timestamp = datetime.now().isoformat()
+        elapsed_us = (time.monotonic_ns() - self._t0) // 1000
         entry = {
-            'timestamp': timestamp,
+            'elapsed_us': elapsed_us,
             'level': level,
             'message': message,
             'data': data or {}
         }
         self.entries.append(entry)
 
-        with open(self.filename, 'a') as f:
-            f.write(f"[{timestamp}] [{level.upper():7}] {message}\n")
-            if data:
-                for k, v in data.items():
-                    f.write(f"    {k}: {v}\n")
+        lines = f"[+{elapsed_us:010d}us] [{level.upper():7}] {message}\n"
+        if data:
+            lines += "".join(f"    {k}: {v}\n" for k, v in data.items())
+
+        if self._fh is None:  # Entries after finalize()
+            with open(self.filename, 'a') as f:
+                f.write(lines)
+            return
+
+        self._fh.write(lines)
+        self._unflushed += 1
+        if level == 'error':
+            self._sync()
+        elif self._unflushed >= self.FLUSH_EVERY:
+            self._fh.flush()
+            self._unflushed = 0
+
+    def _sync(self):
+        """Push buffered entries all the way to disk"""
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._unflushed = 0
 
     def finalize(self, success: bool):
-        duration = (datetime.now() - self.start_time).total_seconds()
+        duration = (time.monotonic_ns() - self._t0) / 1e9
         error_count = sum(1 for e in self.entries if e['level'] == 'error')
         warn_count = sum(1 for e in self.entries if e['level'] == 'warning')
 
@@ -98,8 +160,14 @@ class FlashAuditLog:
             f"Warnings: {warn_count}\n"
             "=" * 70 + "\n"
         )
-        with open(self.filename, 'a') as f:
-            f.write(summary)
+        if self._fh is None:
+            with open(self.filename, 'a') as f:
+                f.write(summary)
+        else:
+            self._fh.write(summary)
+            self._sync()
+            self._fh.close()
+            self._fh = None
 
         return self.filename
 
@@ -123,13 +191,22 @@ class UltimateSafeFlasher:
     RETRY_DELAY = 0.3
     CAN_QUALITY_THRESHOLD = 0.95
 
-    def __init__(self):
+    def __init__(self, interface: str = CAN_INTERFACE, channel: str = CAN_CHANNEL):
+        self.interface = interface
+        self.channel = channel
         self.bus = None
         self.auth_payload = None
         self.audit = None
         self.backup_files = []
         self.original_tune = None
+        # SHA-256 hex digests of the tune being flashed and the one it replaces
+        self._new_tune_digest = None
+        self._original_tune_digest = None
         self.can_stats = {'sent': 0, 'received': 0, 'errors': 0}
+        # Scratch CAN frame, filled in place for every single frame we send.
+        # python-can keeps a bytearray by reference rather than copying it,
+        # so a Message built from this must be sent before the next write
+        self._tx_buf = bytearray(8)
         self.log_callback = None
         self.progress_callback = None
 
@@ -158,22 +235,26 @@ class UltimateSafeFlasher:
     # ==================== CAN Communication ====================
 
     def connect(self) -> bool:
-        """Connect to PCAN with verification"""
+        """Connect to the CAN adapter with verification"""
         for attempt in range(self.MAX_RETRIES):
             try:
                 self.bus = can.interface.Bus(
-                    interface='pcan',
-                    channel='PCAN_USBBUS1',
-                    bitrate=500000
+                    interface=self.interface,
+                    channel=self.channel,
+                    bitrate=CAN_BITRATE
                 )
-                self.log("PCAN connected", 'success')
+                # Only the ECU's responses matter, let the driver drop the rest
+                self.bus.set_filters([
+                    {"can_id": 0x7E8, "can_mask": 0x7FF, "extended": False}
+                ])
+                self.log(f"{self.channel} connected", 'success')
                 return True
             except Exception as ex:
                 msg = f"Connection attempt {attempt+1}/{self.MAX_RETRIES}: {ex}"
                 self.log(msg, 'warning')
                 time.sleep(self.RETRY_DELAY)
 
-        self.log("Failed to connect to PCAN", 'error')
+        self.log(f"Failed to connect to {self.channel}", 'error')
         return False
 
     def disconnect(self):
@@ -187,9 +268,15 @@ class UltimateSafeFlasher:
     def send_frame(self, arb_id: int, data: bytes) -> bool:
         """Send single frame with statistics"""
         try:
-            frame = bytes([len(data)]) + data + bytes(7 - len(data))
+            n = len(data)
+            if n > 7:
+                raise ValueError(f"{n} bytes is too long for a single frame")
+            buf = self._tx_buf
+            buf[0] = n
+            buf[1:1 + n] = data
+            buf[1 + n:] = PADDING[7 - n]
             msg = can.Message(
-                arbitration_id=arb_id, data=frame, is_extended_id=False
+                arbitration_id=arb_id, data=buf, is_extended_id=False
             )
             self.bus.send(msg)
             self.can_stats['sent'] += 1
@@ -213,42 +300,77 @@ class UltimateSafeFlasher:
             self.bus.send(msg)
             self.can_stats['sent'] += 1
 
-            fc = self.bus.recv(timeout=2.0)
-            if not fc or (fc.data[0] & 0xF0) != 0x30:
-                self.can_stats['errors'] += 1
+            # Lay every consecutive frame out in one buffer while the ECU
+            # prepares Flow Control: PCI bytes in column 0, the zero-padded
+            # payload striped across columns 1-7
+            count = -(-(length - 6) // 7)
+            body = data[6:] + bytes(count * 7 - (length - 6))
+            cf_buf = bytearray(count * 8)
+            cf_buf[0::8] = (_CF_PCI_CYCLE * (count // 16 + 1))[:count]
+            for col in range(7):
+                cf_buf[1 + col::8] = body[col::7]
+            view = memoryview(cf_buf)
+            frames = [
+                can.Message(arbitration_id=arb_id, data=view[pos:pos + 8],
+                            is_extended_id=False)
+                for pos in range(0, len(cf_buf), 8)
+            ]
+
+            fc = self._recv_flow_control()
+            if fc is None:
                 return False
-            self.can_stats['received'] += 1
-
-            remaining = data[6:]
-            seq = 1
-            while remaining:
-                chunk = remaining[:7]
-                remaining = remaining[7:]
-                cf = bytes([0x20 | (seq & 0x0F)]) + chunk
-                cf = cf + bytes(8 - len(cf))
-                msg = can.Message(
-                    arbitration_id=arb_id, data=cf, is_extended_id=False
-                )
+            block_size, stmin = fc
+
+            # Consecutive frames go out back to back unless the ECU asked
+            # for a separation time, with a fresh FC every block_size frames
+            for sent, msg in enumerate(frames, 1):
                 self.bus.send(msg)
                 self.can_stats['sent'] += 1
-                seq = (seq + 1) & 0x0F
-                time.sleep(0.001)
+                if sent == count:
+                    break
+                if block_size and sent % block_size == 0:
+                    fc = self._recv_flow_control()
+                    if fc is None:
+                        return False
+                    block_size, stmin = fc
+                elif stmin:
+                    time.sleep(stmin)
 
             return True
         except Exception:
             self.can_stats['errors'] += 1
             return False
 
+    def _recv_flow_control(self) -> Optional[Tuple[int, float]]:
+        """Wait for Flow Control, returns (block_size, STmin in seconds)"""
+        fc = self.bus.recv(timeout=2.0)
+        if not fc or (fc.data[0] & 0xF0) != 0x30:
+            self.can_stats['errors'] += 1
+            return None
+        self.can_stats['received'] += 1
+
+        # STmin per ISO 15765-2: 0x00-0x7F ms, 0xF1-0xF9 100-900us,
+        # reserved values mean the longest separation (127ms)
+        stmin = fc.data[2]
+        if stmin <= 0x7F:
+            gap = stmin / 1000.0
+        elif 0xF1 <= stmin <= 0xF9:
+            gap = (stmin - 0xF0) / 10000.0
+        else:
+            gap = 0.127
+        return (fc.data[1], gap)
+
     def recv_response(self, timeout: float = 2.0) -> Optional[bytes]:
         """Receive response with statistics"""
         try:
             start = time.time()
-            data = bytearray()
+            buf = None
+            pos = 0
             expected = 0
 
             while time.time() - start < timeout:
                 msg = self.bus.recv(timeout=0.1)
-                if not msg or msg.arbitration_id != 0x7E8:
+                if not msg:
                     continue
 
                 self.can_stats['received'] += 1
@@ -258,22 +380,27 @@ class UltimateSafeFlasher:
                     return bytes(msg.data[1:1+(pci & 0x0F)])
 
                 if (pci >> 4) == 1:
+                    # Size the buffer from the First Frame and fill it in place
                     expected = ((pci & 0x0F) << 8) | msg.data[1]
-                    data.extend(msg.data[2:8])
+                    buf = bytearray(expected)
+                    pos = min(6, expected)
+                    buf[0:pos] = msg.data[2:2 + pos]
                     fc_msg = can.Message(
                         arbitration_id=0x7E0,
-                        data=bytes([0x30, 0, 0, 0, 0, 0, 0, 0]),
+                        data=FLOW_CTRL,
                         is_extended_id=False
                     )
                     self.bus.send(fc_msg)
                     self.can_stats['sent'] += 1
 
-                if (pci >> 4) == 2:
-                    data.extend(msg.data[1:8])
-                    if len(data) >= expected:
-                        return bytes(data[:expected])
+                if (pci >> 4) == 2 and buf is not None:
+                    n = min(7, expected - pos)
+                    buf[pos:pos + n] = msg.data[1:1 + n]
+                    pos += n
+                    if pos >= expected:
+                        return bytes(buf)
 
-            return bytes(data) if data else None
+            return bytes(buf[:pos]) if pos else None
         except Exception:
             self.can_stats['errors'] += 1
             return None
@@ -285,19 +412,27 @@ class UltimateSafeFlasher:
         self.log("Testing CAN bus quality...", 'info')
 
         successes = 0
-        tests = 20
-
-        for _ in range(tests):
-            self.send_frame(0x7E0, bytes([0x3E, 0x00]))
+        tests = 0
+        max_tests = 20
+        needed = math.ceil(self.CAN_QUALITY_THRESHOLD * max_tests)
+
+        # Stop as soon as the outcome is decided: enough replies to pass,
+        # or too many misses for the remaining probes to make up
+        while tests < max_tests:
+            self.send_frame(0x7E0, TESTER_PRESENT)
             resp = self.recv_response(timeout=0.5)
+            tests += 1
 
             if resp and resp[0] == 0x7E:
                 successes += 1
 
-            time.sleep(0.05)
+            if successes >= needed or successes + max_tests - tests < needed:
+                break
+
+            time.sleep(0.01)
 
         rate = successes / tests
-        passed = rate >= self.CAN_QUALITY_THRESHOLD
+        passed = successes >= needed
 
         level = 'success' if passed else 'error'
         self.log(
@@ -317,34 +452,37 @@ class UltimateSafeFlasher:
             return False
 
         try:
-            import re
-            with open(capture_file, 'r', errors='ignore') as f:
-                content = f.read()
-
-            matches = re.findall(r'0x7E0\s+8\s+([0-9A-Fa-f]{16})', content)
-
             payload = bytearray()
             collecting = False
 
-            for match in matches:
-                frame = bytes.fromhex(match)
-                pci = frame[0]
-
-                if (pci & 0xF0) == 0x10 and frame[2] == 0x36:
-                    payload = bytearray(frame[4:8])
-                    collecting = True
-                    continue
-
-                if collecting and (pci & 0xF0) == 0x20:
-                    payload.extend(frame[1:8])
-                    if len(payload) >= 2006:
-                        break
+            # Scan the mapped capture as bytes, no text decode or full read,
+            # and stop as soon as the payload is complete
+            with open(capture_file, 'rb') as f:
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # Empty files can't be mapped
+                    mm = None
+                if mm is not None:
+                    with mm:
+                        for match in _CAPTURE_TX_RE.finditer(mm):
+                            frame = bytes.fromhex(match.group(1).decode('ascii'))
+                            pci = frame[0]
+
+                            if (pci & 0xF0) == 0x10 and frame[2] == 0x36:
+                                payload = bytearray(frame[4:8])
+                                collecting = True
+                                continue
+
+                            if collecting and (pci & 0xF0) == 0x20:
+                                payload.extend(frame[1:8])
+                                if len(payload) >= 2006:
+                                    break
 
             if len(payload) >= 2000:
                 self.auth_payload = bytes(payload)
-                checksum = hashlib.md5(self.auth_payload).hexdigest()[:8]
+                checksum = hashlib.blake2b(self.auth_payload, digest_size=4).hexdigest()
                 self.log(
-                    f"Auth loaded: {len(self.auth_payload)} bytes (MD5: {checksum})",
+                    f"Auth loaded: {len(self.auth_payload)} bytes (BLAKE2b: {checksum})",
                     'success'
                 )
                 return True
@@ -370,22 +508,26 @@ class UltimateSafeFlasher:
     def _do_auth(self) -> bool:
         try:
             # TesterPresent
-            self.send_frame(0x7E0, bytes([0x3E, 0x00]))
+            self.send_frame(0x7E0, TESTER_PRESENT)
             time.sleep(0.05)
 
             # Extended Session
             broadcast = can.Message(
                 arbitration_id=0x7DF,
-                data=bytes([0x02, 0x10, 0x03, 0, 0, 0, 0, 0]),
+                data=EXTENDED_SESSION,
                 is_extended_id=False
             )
             self.bus.send(broadcast)
             time.sleep(0.1)
-            while self.bus.recv(timeout=0.05):
+
+            # Flush stale replies; timeout=0 returns immediately when the
+            # queue is empty, the deadline bounds a chattering bus
+            deadline = time.monotonic() + 0.02
+            while time.monotonic() < deadline and self.bus.recv(timeout=0):
                 pass
 
             # Security seed
-            self.send_frame(0x7E0, bytes([0x27, 0x01]))
+            self.send_frame(0x7E0, SEED_REQUEST)
             resp = self.recv_response()
             if not resp or resp[0] != 0x67:
                 return False
@@ -400,8 +542,7 @@ class UltimateSafeFlasher:
                 return False
 
             # Download request
-            req = bytes([0x34, 0x00, 0x44, 0, 0, 0, 0, 0, 0, 0x07, 0xD6])
-            self.send_multiframe(0x7E0, req)
+            self.send_multiframe(0x7E0, AUTH_DOWNLOAD_REQUEST)
             resp = self.recv_response()
             if not resp or resp[0] != 0x74:
                 return False
@@ -421,27 +562,42 @@ class UltimateSafeFlasher:
 
     # ==================== Memory Operations ====================
 
-    def read_memory(self, address: int, length: int,
-                    fmt: int = 0xB0) -> Optional[bytes]:
-        """Read memory with progress and re-auth"""
-        data = bytearray()
+    def read_memory(self, address: int, length: int, fmt: int = 0xB0,
+                    hasher=None,
+                    hash_range: Tuple[int, int] = None,
+                    on_chunk: Callable[[int, bytes], bool] = None
+                    ) -> Optional[bytes]:
+        """
+        Read memory with progress and re-auth.
+
+        If a hashlib object is given it is fed each response as it arrives,
+        limited to the [start, end) offsets of hash_range when set, so the
+        caller gets the checksum without a second pass over the data.
+
+        on_chunk(offset, chunk) is called for every response; returning False
+        stops the read and returns what has been collected so far.
+        """
+        hash_lo, hash_hi = hash_range or (0, length)
+        hash_hi = min(hash_hi, length)
+        data = bytearray(length)
+        pos = 0
         current = address
-        count = 0
+        header = bytes([0x35, fmt, 0x01])
+        pct_per_byte = 100 / length
+        reauth_in = 32  # Reads left before the session is refreshed
 
-        while len(data) < length:
-            if count > 0 and count % 32 == 0:
+        while pos < length:
+            if not reauth_in:
+                reauth_in = 32
                 if not self.authenticate():
                     return None
 
             success = False
             for _ in range(self.MAX_RETRIES):
-                req = bytes([0x35, fmt, 0x01]) + current.to_bytes(4, 'big')
-                self.send_frame(0x7E0, req)
+                self.send_frame(0x7E0, header + current.to_bytes(4, 'big'))
                 resp = self.recv_response(timeout=3.0)
 
                 if resp and resp[0] == 0x75:
-                    data.extend(resp[1:])
-                    current += len(resp) - 1
                     success = True
                     break
                 time.sleep(self.RETRY_DELAY)
@@ -450,10 +606,47 @@ class UltimateSafeFlasher:
                 self.log(f"Read failed at 0x{current:X}", 'error')
                 return None
 
-            count += 1
-            self.progress(len(data) / length * 100)
+            size = len(resp) - 1
+            n = min(size, length - pos)
+            if hasher is not None:
+                lo = max(pos, hash_lo)
+                hi = min(pos + n, hash_hi)
+                if lo < hi:
+                    hasher.update(resp[1 + lo - pos:1 + hi - pos])
+            data[pos:pos + n] = resp[1:1 + n]
+            offset = pos
+            pos += n
+            current += size
+
+            if on_chunk is not None and on_chunk(offset, resp[1:]) is False:
+                return bytes(data[:pos])
+
+            reauth_in -= 1
+            self.progress(pos * pct_per_byte)
+
+        return bytes(data)
+
+    @staticmethod
+    def _tune_matcher(expected: bytes) -> Callable[[int, bytes], bool]:
+        """
+        Build a read_memory on_chunk callback that compares the tune window
+        against expected as it streams in. It stops the read at the first
+        mismatching chunk, or as soon as the whole window has matched, since
+        nothing past the tune is needed for verification.
+        """
+        lo, hi = TUNE_WINDOW
+
+        def check(offset: int, chunk: bytes) -> bool:
+            end = offset + len(chunk)
+            if end <= lo:
+                return True
+            start = max(offset, lo)
+            stop = min(end, hi)
+            if chunk[start - offset:stop - offset] != expected[start - lo:stop - lo]:
+                return False
+            return end < hi
 
-        return bytes(data[:length])
+        return check
 
     def write_block_verified(self, block_num: int, block_data: bytes) -> bool:
         """Write a single block with verification."""
@@ -491,14 +684,13 @@ class UltimateSafeFlasher:
             self.log("RequestDownload rejected", 'error')
             return False
 
-        # Write blocks
+        # Write blocks, padding the final one once up front
+        padded = memoryview(data + bytes(-total % BLOCK_SIZE))
         offset = 0
         seq = 1
 
         while offset < total:
-            chunk = data[offset:offset + BLOCK_SIZE]
-            if len(chunk) < BLOCK_SIZE:
-                chunk = chunk + bytes(BLOCK_SIZE - len(chunk))
+            chunk = padded[offset:offset + BLOCK_SIZE]
 
             if not self.write_block_verified(seq, chunk):
                 self.log(f"Block {seq} failed after all retries", 'error')
@@ -522,11 +714,16 @@ class UltimateSafeFlasher:
         """Calculate SHA256 checksum"""
         return hashlib.sha256(data).hexdigest()
 
-    def create_triple_backup(self, data: bytes,
-                             name_prefix: str) -> List[str]:
-        """Create backups in three locations for redundancy."""
+    def create_triple_backup(self, data: bytes, name_prefix: str,
+                             checksum: str = None) -> List[str]:
+        """
+        Create backups in three locations for redundancy.
+
+        Pass checksum when the SHA-256 of data is already known.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        checksum = self.calculate_checksum(data)
+        if checksum is None:
+            checksum = self.calculate_checksum(data)
 
         backup_info = {
             'timestamp': timestamp,
@@ -535,54 +732,108 @@ class UltimateSafeFlasher:
             'type': name_prefix
         }
 
-        saved = []
-
+        filename = f"{name_prefix}_{timestamp}.bin"
+        meta = json.dumps(backup_info, indent=2).encode()
+        # Skip missing locations and aliases of one already listed (e.g.
+        # running from the home directory), which would race on one file
+        locations = []
+        seen = set()
         for location in BACKUP_LOCATIONS:
-            try:
-                if not os.path.exists(location):
-                    continue
-
-                backup_dir = os.path.join(location, "harley_ecu_backups")
-                os.makedirs(backup_dir, exist_ok=True)
+            real = os.path.realpath(location)
+            if os.path.exists(location) and real not in seen:
+                seen.add(real)
+                locations.append(location)
 
-                filename = f"{name_prefix}_{timestamp}.bin"
-                filepath = os.path.join(backup_dir, filename)
-                with open(filepath, 'wb') as f:
-                    f.write(data)
-
-                meta_file = filepath + ".json"
-                with open(meta_file, 'w') as f:
-                    json.dump(backup_info, f, indent=2)
-
-                saved.append(filepath)
-                self.log(f"Backup saved: {filepath}", 'success')
-
-            except Exception as ex:
-                self.log(f"Backup to {location} failed: {ex}", 'warning')
+        # The copies are independent, write and fsync them all at once
+        saved = []
+        with ThreadPoolExecutor(max_workers=len(locations) or 1) as pool:
+            futures = [
+                pool.submit(self._write_backup, location, filename, data, meta)
+                for location in locations
+            ]
+            for location, future in zip(locations, futures):
+                try:
+                    filepath = future.result()
+                    saved.append(filepath)
+                    self.log(f"Backup saved: {filepath}", 'success')
+                except Exception as ex:
+                    self.log(f"Backup to {location} failed: {ex}", 'warning')
 
         if not saved:
             self.log("WARNING: No backups could be saved!", 'error')
 
         return saved
 
-    def verify_backup(self, filepath: str, expected_checksum: str) -> bool:
-        """Verify backup file integrity"""
+    @staticmethod
+    def _write_durable(filepath: str, data: bytes):
+        """Write a file and fsync it so the backup is really on disk"""
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+        fd = os.open(filepath, flags, 0o644)
         try:
-            with open(filepath, 'rb') as f:
-                data = f.read()
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
 
-            actual = self.calculate_checksum(data)
-            matches = actual == expected_checksum
+    def _write_backup(self, location: str, filename: str,
+                      data: bytes, meta: bytes) -> str:
+        """Write one backup copy and its metadata to disk (worker thread)"""
+        backup_dir = os.path.join(location, "harley_ecu_backups")
+        os.makedirs(backup_dir, exist_ok=True)
 
-            if matches:
-                self.log(f"Backup verified: {filepath}", 'success')
-            else:
-                self.log(f"Backup corrupted: {filepath}", 'error')
+        filepath = os.path.join(backup_dir, filename)
+        self._write_durable(filepath, data)
+        self._write_durable(filepath + ".json", meta)
+        return filepath
 
-            return matches
+    def _read_checksum(self, filepath: str) -> Optional[str]:
+        """Checksum of a file on disk, None if unreadable (worker thread)"""
+        try:
+            # Stream through the hash rather than holding the file in memory
+            with open(filepath, 'rb', buffering=0) as f:
+                if hasattr(hashlib, 'file_digest'):
+                    digest = hashlib.file_digest(f, 'sha256')
+                else:
+                    digest = hashlib.sha256()
+                    for chunk in iter(lambda: f.read(65536), b''):
+                        digest.update(chunk)
+            return digest.hexdigest()
         except Exception:
+            return None
+
+    def _report_backup(self, filepath: str, actual: Optional[str],
+                       expected_checksum: str) -> bool:
+        if actual is None:
             return False
 
+        matches = actual == expected_checksum
+
+        if matches:
+            self.log(f"Backup verified: {filepath}", 'success')
+        else:
+            self.log(f"Backup corrupted: {filepath}", 'error')
+
+        return matches
+
+    def verify_backup(self, filepath: str, expected_checksum: str) -> bool:
+        """Verify backup file integrity"""
+        return self._report_backup(
+            filepath, self._read_checksum(filepath), expected_checksum
+        )
+
+    def verify_backups(self, filepaths: List[str],
+                       expected_checksum: str) -> int:
+        """Verify several backups concurrently, returns how many are intact"""
+        with ThreadPoolExecutor(max_workers=len(filepaths) or 1) as pool:
+            checksums = list(pool.map(self._read_checksum, filepaths))
+
+        return sum(
+            self._report_backup(filepath, actual, expected_checksum)
+            for filepath, actual in zip(filepaths, checksums)
+        )
+
     # ==================== Ultimate Flash ====================
 
     def ultimate_flash(self, tune_file: str, capture_file: str) -> bool:
@@ -622,7 +873,8 @@ class UltimateSafeFlasher:
             with open(tune_file, 'rb') as f:
                 new_tune = f.read()
 
-            new_checksum = self.calculate_checksum(new_tune)
+            self._new_tune_digest = self.calculate_checksum(new_tune)
+            new_checksum = self._new_tune_digest
             self.log(f"New tune checksum: {new_checksum[:16]}...", 'info')
             self.log("Pre-flight: PASSED", 'success')
 
@@ -653,21 +905,23 @@ class UltimateSafeFlasher:
                 return False
 
             self.log("Reading current calibration...", 'info')
-            cal_data = self.read_memory(0x7D8000, 0x28000, 0xB0)
+            tune_hash = hashlib.sha256()
+            cal_data = self.read_memory(0x7D8000, 0x28000, 0xB0, tune_hash, TUNE_WINDOW)
 
             if not cal_data:
                 self.log("Failed to read current calibration", 'error')
                 return False
 
             self.original_tune = cal_data[TUNE_OFFSET:TUNE_OFFSET + TUNE_SIZE]
-            original_checksum = self.calculate_checksum(self.original_tune)
+            self._original_tune_digest = tune_hash.hexdigest()
+            original_checksum = self._original_tune_digest
             self.log(
                 f"Original tune checksum: {original_checksum[:16]}...",
                 'info'
             )
 
             self.backup_files = self.create_triple_backup(
-                self.original_tune, "backup_before_flash"
+                self.original_tune, "backup_before_flash", original_checksum
             )
 
             if len(self.backup_files) < 2:
@@ -676,10 +930,9 @@ class UltimateSafeFlasher:
             # ===== STEP 5: Verify Backups =====
             self.log("\n[5/8] VERIFYING BACKUPS", 'info')
 
-            verified_count = 0
-            for bf in self.backup_files:
-                if self.verify_backup(bf, original_checksum):
-                    verified_count += 1
+            verified_count = self.verify_backups(
+                self.backup_files, original_checksum
+            )
 
             if verified_count == 0:
                 self.log("No backups verified - aborting!", 'error')
@@ -704,13 +957,13 @@ class UltimateSafeFlasher:
 
             # Reset ECU
             self.log("Resetting ECU...", 'info')
-            self.send_frame(0x7E0, bytes([0x11, 0x01]))
+            self.send_frame(0x7E0, ECU_RESET)
             time.sleep(2)
 
             # Clear DTCs
             dtc_msg = can.Message(
                 arbitration_id=0x7DF,
-                data=bytes([0x04, 0x14, 0xFF, 0xFF, 0xFF, 0, 0, 0]),
+                data=CLEAR_DTC,
                 is_extended_id=False
             )
             self.bus.send(dtc_msg)
@@ -724,21 +977,32 @@ class UltimateSafeFlasher:
                 return False
 
             self.log("Reading back written data...", 'info')
-            verify_cal = self.read_memory(0x7D8000, 0x28000, 0xB0)
+            tune_hash = hashlib.sha256()
+            verify_cal = self.read_memory(
+                0x7D8000, 0x28000, 0xB0, tune_hash, TUNE_WINDOW,
+                on_chunk=self._tune_matcher(new_tune)
+            )
 
             if not verify_cal:
                 self.log("Verification read failed", 'error')
                 return False
 
             verify_tune = verify_cal[TUNE_OFFSET:TUNE_OFFSET + TUNE_SIZE]
-            verify_checksum = self.calculate_checksum(verify_tune)
-
-            if verify_tune != new_tune:
-                diff_count = sum(
-                    1 for a, b in zip(verify_tune, new_tune) if a != b
-                )
+            verify_checksum = tune_hash.hexdigest()
+
+            if not hmac.compare_digest(verify_checksum, new_checksum):
+                if HAS_NUMPY and len(verify_tune) == len(new_tune):
+                    diff_count = int(np.count_nonzero(
+                        np.frombuffer(verify_tune, dtype=np.uint8)
+                        != np.frombuffer(new_tune, dtype=np.uint8)
+                    ))
+                else:
+                    diff_count = sum(
+                        1 for a, b in zip(verify_tune, new_tune) if a != b
+                    )
                 self.log(
-                    f"VERIFICATION FAILED: {diff_count} bytes differ!",
+                    f"VERIFICATION FAILED: {diff_count} bytes differ "
+                    f"in first {len(verify_tune)} bytes read back!",
                     'error'
                 )
                 return False
@@ -752,14 +1016,16 @@ class UltimateSafeFlasher:
             if not self.authenticate():
                 return False
 
-            verify2_cal = self.read_memory(0x7D8000, 0x28000, 0xB0)
+            tune_hash = hashlib.sha256()
+            verify2_cal = self.read_memory(
+                0x7D8000, 0x28000, 0xB0, tune_hash, TUNE_WINDOW,
+                on_chunk=self._tune_matcher(new_tune)
+            )
             if not verify2_cal:
                 self.log("Second verification read failed", 'error')
                 return False
 
-            verify2_tune = verify2_cal[TUNE_OFFSET:TUNE_OFFSET + TUNE_SIZE]
-
-            if verify2_tune != new_tune:
+            if not hmac.compare_digest(tune_hash.hexdigest(), new_checksum):
                 self.log("SECOND VERIFICATION FAILED!", 'error')
                 return False
 
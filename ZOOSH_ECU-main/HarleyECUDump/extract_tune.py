@@ -16,6 +16,12 @@ import os
 import sys
 from datetime import datetime
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 # Memory mapping constants
 DUMP_START = 0x7D8000
 TUNE_OFFSET = 0x1C000  # Offset within the 160KB dump
@@ -89,21 +95,26 @@ def compare_tunes(tune1_file: str, tune2_file: str):
         print(f"[-] Different sizes!")
         return
     
-    diffs = []
-    for i in range(len(tune1)):
-        if tune1[i] != tune2[i]:
-            diffs.append((i, tune1[i], tune2[i]))
+    # Count every difference but only keep the offsets that get printed
+    if HAS_NUMPY:
+        mask = np.frombuffer(tune1, dtype=np.uint8) != np.frombuffer(tune2, dtype=np.uint8)
+        total = int(np.count_nonzero(mask))
+        first = np.flatnonzero(mask)[:20].tolist()
+    else:
+        offsets = [i for i, (b1, b2) in enumerate(zip(tune1, tune2)) if b1 != b2]
+        total = len(offsets)
+        first = offsets[:20]
     
-    if not diffs:
+    if not total:
         print("[+] Files are IDENTICAL!")
     else:
-        print(f"[-] {len(diffs)} bytes differ ({len(diffs)*100/len(tune1):.1f}%)")
+        print(f"[-] {total} bytes differ ({total*100/len(tune1):.1f}%)")
         print("\n    First 20 differences:")
-        for i, (offset, b1, b2) in enumerate(diffs[:20]):
-            print(f"      0x{offset:04X}: 0x{b1:02X} -> 0x{b2:02X}")
+        for offset in first:
+            print(f"      0x{offset:04X}: 0x{tune1[offset]:02X} -> 0x{tune2[offset]:02X}")
         
-        if len(diffs) > 20:
-            print(f"      ... and {len(diffs) - 20} more")
+        if total > 20:
+            print(f"      ... and {total - 20} more")
 
 
 def main():
@@ -140,30 +140,32 @@ class HarleyECU:
         self.send_frame(tx_id, ff)
         
         # Wait for Flow Control
-        start = time.time()
-        fc_stmin = 1
-        while time.time() - start < timeout:
-            msg = self.bus.recv(timeout=0.1)
-            if msg and msg.arbitration_id == RX_ECU:
-                if (msg.data[0] & 0xF0) == 0x30:
-                    fc_stmin = msg.data[2] if msg.data[2] > 0 else 1
-                    break
-        else:
+        stmin = self.wait_flow_control(timeout)
+        if stmin is None:
             return False
+        fc_stmin = stmin if stmin > 0 else 1
         
         # Send Consecutive Frames
-        remaining = payload[6:]
-        seq = 1
-        while remaining:
-            cf_data = remaining[:7]
-            remaining = remaining[7:]
-            cf = bytes([0x20 | (seq & 0x0F)]) + cf_data
+        # (walk the payload by offset - re-slicing the tail copies it every CF)
+        for seq, pos in enumerate(range(6, total_len, 7), 1):
+            cf = bytes([0x20 | (seq & 0x0F)]) + payload[pos:pos + 7]
             self.send_frame(tx_id, cf.ljust(8, b'\x00'))
-            seq += 1
-            time.sleep(fc_stmin / 1000.0)
+            # STmin only separates CFs - go straight to the response after the last one
+            if pos + 7 < total_len:
+                time.sleep(fc_stmin / 1000.0)
         
         return True
     
+    def wait_flow_control(self, timeout: float = 2.0) -> Optional[int]:
+        """Wait for the ECU's Flow Control frame, returns its STmin byte"""
+        start = time.time()
+        while time.time() - start < timeout:
+            msg = self.bus.recv(timeout=0.1)
+            if msg and msg.arbitration_id == RX_ECU:
+                if (msg.data[0] & 0xF0) == 0x30:
+                    return msg.data[2]
+        return None
+    
     def recv_response(self, timeout: float = 2.0) -> Optional[bytes]:
         """Receive single-frame response"""
         start = time.time()
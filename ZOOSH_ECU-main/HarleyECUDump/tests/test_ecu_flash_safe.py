@@ -0,0 +1,54 @@
+"""
+ISO-TP framing checks for SafeECUFlasher, run against an in-memory bus.
+
+    python -m pytest HarleyECUDump/tests
+"""
+
+import os
+import sys
+
+import pytest
+
+can = pytest.importorskip("can")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ecu_flash_safe import SafeECUFlasher  # noqa: E402
+
+# Flow Control: continue to send, no block limit, no separation time
+FLOW_CONTINUE = bytes([0x30, 0x00, 0x00, 0, 0, 0, 0, 0])
+
+
+class RecordingBus:
+    """Records frame bytes as they go on the wire, answers a First Frame with Flow Control"""
+
+    def __init__(self):
+        self.wire = []
+        self.rx = []
+
+    def send(self, msg, timeout=None):
+        data = bytes(msg.data)
+        self.wire.append(data)
+        if data[0] & 0xF0 == 0x10:
+            self.rx.append(can.Message(arbitration_id=0x7E8, data=FLOW_CONTINUE, is_extended_id=False))
+
+    def recv(self, timeout=None):
+        return self.rx.pop(0) if self.rx else None
+
+
+def expected_frames(payload):
+    length = len(payload)
+    frames = [bytes([0x10 | (length >> 8), length & 0xFF]) + payload[:6]]
+    for i, pos in enumerate(range(6, length, 7), 1):
+        frames.append((bytes([0x20 | (i & 0x0F)]) + payload[pos:pos + 7]).ljust(8, b"\0"))
+    return frames
+
+
+@pytest.mark.parametrize("length", [8, 40, 258, 2006])
+def test_multiframe_consecutive_frames_carry_their_own_payload(length):
+    flasher = SafeECUFlasher(log_func=lambda *a: None)
+    flasher.bus = RecordingBus()
+    payload = bytes(i & 0xFF for i in range(length))
+
+    assert flasher.send_multiframe(0x7E0, payload)
+    assert flasher.bus.wire == expected_frames(payload)